@@ -0,0 +1,39 @@
+"""
+JSON helpers: use orjson when it is installed, otherwise the standard library.
+Install the `fast` extra (`pip install kroger-cart[fast]`) to enable orjson.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Reused stdlib encoders for when orjson isn't installed. Like orjson, they
+# emit non-ASCII text (e.g. "Café") as-is rather than as \uXXXX escapes.
+_COMPACT_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+_INDENT_ENCODER = json.JSONEncoder(ensure_ascii=False, indent=2)
+
+
+def loads(data: str | bytes):
+    """Parse a JSON document from str or bytes.
+
+    Raises:
+        json.JSONDecodeError: If the input is not valid JSON (orjson's
+            decode error is a subclass, so callers can catch either).
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj, pretty: bool = False) -> str:
+    """Serialize an object to a JSON string.
+
+    Output is compact by default; `pretty=True` indents with two spaces.
+    Both backends produce the same layout.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0).decode()
+    return (_INDENT_ENCODER if pretty else _COMPACT_ENCODER).encode(obj)
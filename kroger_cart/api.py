@@ -2,12 +2,77 @@
 Kroger API client functions: location lookup, product search, and cart management.
 """
 
+from __future__ import annotations
+
 import re
+import time
 import logging
-from requests import Session
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from kroger_cart import _json
+
+if TYPE_CHECKING:
+    # Only needed for annotations; importing requests here would slow CLI start-up
+    from requests import Session
 
 logger = logging.getLogger(__name__)
 
+# Query cleanup patterns, compiled once at import
+_SPECIAL_CHARS_RE = re.compile(r"[^a-zA-Z0-9\s.]")
+_WHITESPACE_RE = re.compile(r"\s+")
+_SIZE_NOISE_RE = re.compile(
+    r"\b(\d+\s*(oz|lb|lbs|ct|count|pack|pk|fl|gal|gallon|kg|g|ml|liter|litre)s?)\b",
+    re.IGNORECASE,
+)
+
+# Maximum number of product searches in flight at once
+DEFAULT_SEARCH_WORKERS = 5
+
+# Maximum number of items sent in a single cart/add request
+CART_BATCH_SIZE = 50
+
+# In-process TTL caches (seconds). Store locations rarely change; product
+# results carry price/stock, so they are only reused briefly.
+LOCATION_CACHE_TTL = 900
+SEARCH_CACHE_TTL = 60
+_CACHE_MAXSIZE = 512
+
+_location_cache: dict[tuple, tuple[float, str]] = {}
+_search_cache: dict[tuple, tuple[float, list[dict]]] = {}
+# Search workers read and write the caches concurrently
+_cache_lock = threading.Lock()
+
+
+def _cache_get(cache: dict, key: tuple):
+    """Return a cached value, or None if missing or expired."""
+    with _cache_lock:
+        entry = cache.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if time.monotonic() >= expires:
+            cache.pop(key, None)
+            return None
+        return value
+
+
+def _cache_set(cache: dict, key: tuple, value, ttl: float) -> None:
+    """Store a value with a TTL, evicting the oldest entry when full."""
+    with _cache_lock:
+        if key not in cache and len(cache) >= _CACHE_MAXSIZE:
+            cache.pop(next(iter(cache)), None)
+        cache[key] = (time.monotonic() + ttl, value)
+
+
+def clear_caches() -> None:
+    """Drop all cached location and search results."""
+    with _cache_lock:
+        _location_cache.clear()
+        _search_cache.clear()
+
 
 def sanitize_query(query: str) -> str:
     """Strip special characters and excess detail that cause 400 errors.
@@ -16,9 +81,9 @@ def sanitize_query(query: str) -> str:
     like &, #, @, and overly specific size descriptors.
     """
     # Remove special characters (keep letters, numbers, spaces, periods)
-    cleaned = re.sub(r"[^a-zA-Z0-9\s.]", " ", query)
+    cleaned = _SPECIAL_CHARS_RE.sub(" ", query)
     # Collapse multiple spaces
-    cleaned = re.sub(r"\s+", " ", cleaned).strip()
+    cleaned = _WHITESPACE_RE.sub(" ", cleaned).strip()
     return cleaned
 
 
@@ -27,10 +92,23 @@ def simplify_query(query: str) -> str:
 
     Used as a fallback when a specific query gets a 400 error.
     """
+    # Most queries have no size words; skip the substitution for those
+    if not _SIZE_NOISE_RE.search(query):
+        return query
     # Remove common size/quantity patterns
-    noise = r"\b(\d+\s*(oz|lb|lbs|ct|count|pack|pk|fl|gal|gallon|kg|g|ml|liter|litre)s?)\b"
-    simplified = re.sub(noise, "", query, flags=re.IGNORECASE)
-    return re.sub(r"\s+", " ", simplified).strip()
+    simplified = _SIZE_NOISE_RE.sub("", query)
+    return _WHITESPACE_RE.sub(" ", simplified).strip()
+
+
+def query_variants(query: str) -> list[str]:
+    """Return the distinct search terms to try for a query, most specific first.
+
+    The sanitized query comes first, followed by its simplified form if that
+    differs. Empty and duplicate variants are dropped, so a query that is
+    already minimal produces a single attempt.
+    """
+    clean = sanitize_query(query)
+    return list(dict.fromkeys(v for v in (clean, simplify_query(clean)) if v))
 
 
 def extract_product_info(product: dict) -> dict:
@@ -81,14 +159,25 @@ def extract_product_info(product: dict) -> dict:
     return info
 
 
+@lru_cache(maxsize=8)
 def get_headers(access_token: str) -> dict:
-    """Build standard API request headers."""
+    """Build standard API request headers.
+
+    The dict is built once per token and shared between calls, so callers
+    must treat it as read-only.
+    """
     return {
         "Authorization": f"Bearer {access_token}",
         "Accept": "application/json",
     }
 
 
+@lru_cache(maxsize=8)
+def get_json_headers(access_token: str) -> dict:
+    """Build request headers for calls with a JSON body (read-only, cached)."""
+    return {**get_headers(access_token), "Content-Type": "application/json"}
+
+
 def find_location(
     session: Session, access_token: str, api_base: str, zip_code: str, chain: str = "Smiths"
 ) -> str:
@@ -101,12 +190,19 @@ def find_location(
         zip_code: Zip code to search near.
         chain: Store chain name (default: Smiths).
 
+    Results are cached in-process for LOCATION_CACHE_TTL seconds.
+
     Returns:
         Location ID string.
 
     Raises:
         Exception: If no locations are found.
     """
+    cache_key = (api_base, zip_code, chain)
+    cached = _cache_get(_location_cache, cache_key)
+    if cached is not None:
+        return cached
+
     url = f"{api_base}/locations"
     params = {
         "filter.zipCode.near": zip_code,
@@ -116,14 +212,17 @@ def find_location(
 
     response = session.get(url, headers=get_headers(access_token), params=params)
     response.raise_for_status()
-    data = response.json()
+    data = _json.loads(response.content)
 
     if not data.get("data"):
         raise Exception(f"No {chain} locations found near zip {zip_code}")
 
     location = data["data"][0]
     addr = location["address"]
-    logger.info(f"Found location: {location['name']} ({addr['addressLine1']}, {addr['city']})")
+    logger.info(
+        "Found location: %s (%s, %s)", location["name"], addr["addressLine1"], addr["city"]
+    )
+    _cache_set(_location_cache, cache_key, location["locationId"], LOCATION_CACHE_TTL)
     return location["locationId"]
 
 
@@ -133,7 +232,8 @@ def search_product(
     """Search for products at a specific location.
 
     Automatically sanitizes the query and retries with a simplified
-    version if the API returns a 400 error.
+    version if the API returns a 400 error. Non-empty results are cached
+    in-process for SEARCH_CACHE_TTL seconds.
 
     Args:
         session: HTTP session.
@@ -146,13 +246,20 @@ def search_product(
         List of product dicts from the API.
     """
     url = f"{api_base}/products"
-    clean_query = sanitize_query(query)
+    attempts = query_variants(query)
+    if not attempts:
+        logger.debug("  Query '%s' is empty after sanitizing, skipping search", query)
+        return []
 
     # Try with sanitized query first
-    attempts = [clean_query]
-    simplified = simplify_query(clean_query)
-    if simplified and simplified != clean_query:
-        attempts.append(simplified)
+    clean_query = attempts[0]
+    if clean_query != query:
+        logger.debug("  Sanitized query '%s' -> '%s'", query, clean_query)
+
+    cache_key = (api_base, clean_query, location_id)
+    cached = _cache_get(_search_cache, cache_key)
+    if cached is not None:
+        return cached
 
     for attempt in attempts:
         params = {
@@ -164,7 +271,7 @@ def search_product(
         response = session.get(url, headers=get_headers(access_token), params=params)
 
         if response.status_code == 400:
-            logger.debug(f"  Query '{attempt}' got 400, trying simpler query...")
+            logger.debug("  Query '%s' got 400, trying simpler query...", attempt)
             continue
 
         if response.status_code == 401:
@@ -173,17 +280,56 @@ def search_product(
             )
 
         response.raise_for_status()
-        data = response.json()
+        data = _json.loads(response.content)
         results = data.get("data", [])
 
         if results:
             if attempt != clean_query:
-                logger.debug(f"  Found results with simplified query: '{attempt}'")
+                logger.debug("  Found results with simplified query: '%s'", attempt)
+            _cache_set(_search_cache, cache_key, results, SEARCH_CACHE_TTL)
             return results
 
     return []
 
 
+def search_products(
+    session: Session,
+    access_token: str,
+    api_base: str,
+    queries: list[str],
+    location_id: str,
+    max_workers: int = DEFAULT_SEARCH_WORKERS,
+) -> list[list[dict]]:
+    """Search for several products concurrently.
+
+    Each query still needs its own request, but the requests are I/O-bound,
+    so they are issued from a small thread pool sharing the same session.
+
+    Args:
+        session: HTTP session.
+        access_token: OAuth access token.
+        api_base: Kroger API base URL.
+        queries: Search terms.
+        location_id: Store location ID.
+        max_workers: Maximum number of concurrent requests.
+
+    Returns:
+        One list of product dicts per query, in the same order as `queries`.
+    """
+    if len(queries) <= 1 or max_workers <= 1:
+        return [
+            search_product(session, access_token, api_base, query, location_id)
+            for query in queries
+        ]
+
+    workers = min(max_workers, len(queries))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(
+            lambda query: search_product(session, access_token, api_base, query, location_id),
+            queries,
+        ))
+
+
 def add_to_cart(
     session: Session,
     access_token: str,
@@ -213,14 +359,14 @@ def add_to_cart(
 
     response = session.put(
         url,
-        headers={**get_headers(access_token), "Content-Type": "application/json"},
+        headers=get_json_headers(access_token),
         json=payload,
     )
     response.raise_for_status()
 
     # Kroger returns 204 No Content on success
     if response.content:
-        return response.json()
+        return _json.loads(response.content)
     return {"status": response.status_code}
 
 
@@ -233,6 +379,9 @@ def add_to_cart_batch(
 ) -> dict:
     """Add multiple items to the cart in a single API call.
 
+    Items that share a UPC are merged into one line with their quantities
+    summed, so the payload carries each product once.
+
     Args:
         session: HTTP session.
         access_token: OAuth access token.
@@ -244,14 +393,17 @@ def add_to_cart_batch(
         Response dict (may be empty on 204 No Content).
     """
     url = f"{api_base}/cart/add"
+    quantities = {}
+    for item in items:
+        quantities[item["upc"]] = quantities.get(item["upc"], 0) + item.get("quantity", 1)
     payload = {
-        "items": [{"upc": item["upc"], "quantity": item.get("quantity", 1)} for item in items],
+        "items": [{"upc": upc, "quantity": quantity} for upc, quantity in quantities.items()],
         "modality": modality,
     }
 
     response = session.put(
         url,
-        headers={**get_headers(access_token), "Content-Type": "application/json"},
+        headers=get_json_headers(access_token),
         json=payload,
     )
 
@@ -263,7 +415,7 @@ def add_to_cart_batch(
     response.raise_for_status()
 
     if response.content:
-        return response.json()
+        return _json.loads(response.content)
     return {"status": response.status_code}
 
 
@@ -295,5 +447,5 @@ def get_cart(
     if not response.content:
         return []
 
-    data = response.json()
+    data = _json.loads(response.content)
     return data.get("data", [])
@@ -4,17 +4,21 @@ Handles token storage with optional OS keyring support and file-based fallback.
 """
 
 import os
-import json
 import stat
 import base64
 import hashlib
 import secrets
 import platform
+import time
 import logging
+import threading
 import webbrowser
+from functools import lru_cache
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import parse_qs, urlparse, urlencode
-from datetime import datetime, timedelta
+from datetime import datetime
+
+from kroger_cart import _json
 
 logger = logging.getLogger(__name__)
 
@@ -23,24 +27,44 @@ logger = logging.getLogger(__name__)
 
 
 class FileStorage:
-    """Store tokens in a local JSON file with restricted permissions."""
+    """Store tokens in a local JSON file with restricted permissions.
+
+    Saves are atomic (write to a temp file, then rename over the original) so
+    a crash mid-write can't leave a corrupt token file. Loaded tokens are kept
+    in memory until the file changes on disk.
+    """
+
+    __slots__ = ("path", "_cache")
 
     def __init__(self, path: str):
         self.path = path
+        self._cache = None  # ((mtime_ns, size), tokens)
 
     def save(self, tokens: dict) -> None:
-        with open(self.path, "w") as f:
-            json.dump(tokens, f)
+        self._cache = None
+        tmp_path = f"{self.path}.tmp"
+        # Create the temp file as 600 so tokens are never briefly world-readable
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(_json.dumps(tokens))
         # Restrict file permissions on Unix (Windows is single-user by default)
         if platform.system() != "Windows":
-            os.chmod(self.path, stat.S_IRUSR | stat.S_IWUSR)  # 600
+            os.chmod(tmp_path, stat.S_IRUSR | stat.S_IWUSR)  # 600
+        os.replace(tmp_path, self.path)
         logger.debug(f"Tokens saved to {self.path} (file storage)")
 
     def load(self) -> dict | None:
-        if not os.path.exists(self.path):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
             return None
+        version = (st.st_mtime_ns, st.st_size)
+        if self._cache and self._cache[0] == version:
+            return dict(self._cache[1])
         with open(self.path, "r") as f:
-            return json.load(f)
+            tokens = _json.loads(f.read())
+        self._cache = (version, tokens)
+        return dict(tokens)
 
     def __str__(self):
         return f"File ({self.path})"
@@ -49,20 +73,22 @@ class FileStorage:
 class KeyringStorage:
     """Store tokens in the OS keychain via the keyring library."""
 
+    __slots__ = ()
+
     SERVICE_NAME = "kroger-cart"
     KEY_NAME = "oauth-tokens"
 
     def save(self, tokens: dict) -> None:
         import keyring
 
-        keyring.set_password(self.SERVICE_NAME, self.KEY_NAME, json.dumps(tokens))
+        keyring.set_password(self.SERVICE_NAME, self.KEY_NAME, _json.dumps(tokens))
         logger.debug("Tokens saved to OS keychain (keyring storage)")
 
     def load(self) -> dict | None:
         import keyring
 
         data = keyring.get_password(self.SERVICE_NAME, self.KEY_NAME)
-        return json.loads(data) if data else None
+        return _json.loads(data) if data else None
 
     def __str__(self):
         return "OS Keychain"
@@ -92,16 +118,26 @@ def get_storage_backend(token_file: str, force: str | None = None):
             return FileStorage(token_file)
 
     # Auto-detect: try keyring, fall back to file
+    if _keyring_available():
+        return KeyringStorage()
+    return FileStorage(token_file)
+
+
+@lru_cache(maxsize=1)
+def _keyring_available() -> bool:
+    """Check for a usable keyring backend.
+
+    Importing keyring and probing its backend can be slow (it may load
+    D-Bus/SecretService on Linux), so the answer is cached for the process.
+    """
     try:
         import keyring
 
         backend = keyring.get_keyring()
         backend_name = type(backend).__name__.lower()
-        if "fail" in backend_name or "null" in backend_name:
-            raise RuntimeError("No usable keyring backend")
-        return KeyringStorage()
+        return "fail" not in backend_name and "null" not in backend_name
     except Exception:
-        return FileStorage(token_file)
+        return False
 
 
 # ─── OAuth Callback Server ──────────────────────────────────────────────────
@@ -125,6 +161,7 @@ class OAuthCallbackHandler(BaseHTTPRequestHandler):
                 b"<p>You can close this window and return to the terminal.</p>"
                 b"</body></html>"
             )
+            self.server.callback_received.set()
         elif "error" in query:
             self.server.auth_error = query["error"][0]
             self.send_response(400)
@@ -137,6 +174,7 @@ class OAuthCallbackHandler(BaseHTTPRequestHandler):
                 f"<p>Error: {error_msg}</p>"
                 f"</body></html>".encode()
             )
+            self.server.callback_received.set()
         else:
             self.send_response(400)
             self.end_headers()
@@ -155,13 +193,9 @@ def generate_pkce() -> tuple[str, str]:
     Returns:
         Tuple of (code_verifier, code_challenge).
     """
-    code_verifier = base64.urlsafe_b64encode(secrets.token_bytes(32)).decode().rstrip("=")
-    code_challenge = (
-        base64.urlsafe_b64encode(hashlib.sha256(code_verifier.encode()).digest())
-        .decode()
-        .rstrip("=")
-    )
-    return code_verifier, code_challenge
+    verifier_bytes = base64.urlsafe_b64encode(secrets.token_bytes(32)).rstrip(b"=")
+    challenge_bytes = base64.urlsafe_b64encode(hashlib.sha256(verifier_bytes).digest()).rstrip(b"=")
+    return verifier_bytes.decode("ascii"), challenge_bytes.decode("ascii")
 
 
 # ─── Token Management ────────────────────────────────────────────────────────
@@ -207,11 +241,17 @@ class TokenManager:
         return self._authenticate()
 
     def _is_expired(self, tokens: dict) -> bool:
-        """Check if the access token is expired (with 5-minute buffer)."""
-        if "expires_at" not in tokens:
+        """Check if the access token is expired (with 5-minute buffer).
+
+        `expires_at` is a Unix timestamp; ISO-8601 strings written by older
+        versions are still accepted.
+        """
+        expires = tokens.get("expires_at")
+        if expires is None:
             return True
-        expires = datetime.fromisoformat(tokens["expires_at"])
-        return datetime.now() >= expires - timedelta(minutes=5)
+        if isinstance(expires, str):
+            expires = datetime.fromisoformat(expires).timestamp()
+        return time.time() >= expires - 300
 
     def _refresh(self, refresh_token: str) -> str:
         """Refresh the access token using a refresh token."""
@@ -281,10 +321,18 @@ class TokenManager:
 
         server.auth_code = None
         server.auth_error = None
+        server.callback_received = threading.Event()
+
+        # Serve in the background and block until the handler sees the callback
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
 
         logger.info(f"Waiting for authentication on {callback_host}:{callback_port}...")
-        while server.auth_code is None and server.auth_error is None:
-            server.handle_request()
+        try:
+            server.callback_received.wait()
+        finally:
+            server.shutdown()
+            server.server_close()
 
         if server.auth_error:
             raise Exception(f"Authentication error: {server.auth_error}")
@@ -309,8 +357,6 @@ class TokenManager:
         return tokens["access_token"]
 
     def _save(self, tokens: dict) -> None:
-        """Save tokens with expiration timestamp."""
-        tokens["expires_at"] = (
-            datetime.now() + timedelta(seconds=tokens.get("expires_in", 1800))
-        ).isoformat()
+        """Save tokens with expiration timestamp (Unix seconds)."""
+        tokens["expires_at"] = int(time.time()) + tokens.get("expires_in", 1800)
         self.storage.save(tokens)
@@ -0,0 +1,110 @@
+"""
+Persistent lookup caches stored as JSON files in the config directory.
+Lets repeat runs skip API calls whose answers rarely change.
+"""
+
+import os
+import time
+import logging
+
+from kroger_cart import _json
+
+logger = logging.getLogger(__name__)
+
+# Which product a query matches rarely changes. Only the match (UPC and name)
+# is cached; price and stock go stale quickly and are never served from it.
+PRODUCT_CACHE_TTL = 7 * 24 * 3600
+
+# The store chosen for a zip code changes even less often
+LOCATION_CACHE_TTL = 30 * 24 * 3600
+
+
+class JsonCache:
+    """A string-keyed cache with per-entry expiry, persisted to a JSON file.
+
+    The file is read lazily on first access and only written back by save()
+    when something changed. A missing or unreadable file is treated as empty.
+    """
+
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self._entries = None
+        self._dirty = False
+
+    def _load(self) -> dict:
+        if self._entries is None:
+            try:
+                with open(self.path, "rb") as f:
+                    entries = _json.loads(f.read())
+                self._entries = entries if isinstance(entries, dict) else {}
+            except FileNotFoundError:
+                self._entries = {}
+            except (OSError, ValueError) as e:
+                logger.debug("Ignoring unreadable cache %s: %s", self.path, e)
+                self._entries = {}
+        return self._entries
+
+    def _is_fresh(self, entry, now: float) -> bool:
+        # Malformed entries (hand-edited or from another version) count as stale
+        if not isinstance(entry, dict) or "value" not in entry:
+            return False
+        ts = entry.get("ts")
+        if isinstance(ts, bool) or not isinstance(ts, (int, float)):
+            return False
+        return now - ts < self.ttl
+
+    def get(self, key: str):
+        """Return the cached value for key, or None if missing or expired."""
+        entry = self._load().get(key)
+        if entry is None:
+            return None
+        if not self._is_fresh(entry, time.time()):
+            del self._entries[key]
+            self._dirty = True
+            return None
+        return entry["value"]
+
+    def set(self, key: str, value) -> None:
+        """Store a JSON-serializable value under key."""
+        self._load()[key] = {"value": value, "ts": time.time()}
+        self._dirty = True
+
+    def delete(self, key: str) -> None:
+        """Remove key from the cache if present."""
+        if self._load().pop(key, None) is not None:
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache to disk atomically, dropping expired entries."""
+        if not self._dirty:
+            return
+        now = time.time()
+        entries = {k: v for k, v in self._load().items() if self._is_fresh(v, now)}
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(_json.dumps(entries))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            # A cache that can't be written shouldn't fail the run
+            logger.warning("Could not save cache %s: %s", self.path, e)
+            return
+        self._entries = entries
+        self._dirty = False
+        logger.debug("Saved %d cache entries to %s", len(entries), self.path)
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a search query so trivially different spellings match."""
+    return query.strip().lower()
+
+
+def product_cache_key(location_id: str, query: str) -> str:
+    """Build the product cache key for a query at a store."""
+    return f"{location_id}|{normalize_query(query)}"
+
+
+def location_cache_key(api_base: str, zip_code: str) -> str:
+    """Build the location cache key for a zip code in an API environment."""
+    return f"{api_base}|{zip_code.strip()}"
@@ -6,30 +6,60 @@ Handles argument parsing, item loading, output formatting, and orchestration.
 import os
 import sys
 import json
-import csv
 import logging
 import argparse
-import requests
+from functools import lru_cache
 from urllib.parse import urlparse
 
-from dotenv import load_dotenv
-
 from kroger_cart import __version__
-from kroger_cart.session import create_session
-from kroger_cart.auth import TokenManager, get_storage_backend
-from kroger_cart import api
+from kroger_cart import api, _json
+from kroger_cart.cache import (
+    LOCATION_CACHE_TTL,
+    PRODUCT_CACHE_TTL,
+    JsonCache,
+    location_cache_key,
+    normalize_query,
+    product_cache_key,
+)
 
 logger = logging.getLogger(__name__)
 
+# Fallback .env in the source checkout (for running from a clone)
+_PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_PROJECT_ENV = os.path.join(_PROJECT_DIR, ".env")
+
+_TOKEN_STORAGE_CHOICES = ("auto", "file", "keyring")
+
+# Kroger API endpoints for each environment (CERT is the sandbox)
+_API_URLS = {
+    env: {
+        "auth_url": f"https://{domain}/v1/connect/oauth2/authorize",
+        "token_url": f"https://{domain}/v1/connect/oauth2/token",
+        "api_base": f"https://{domain}/v1",
+    }
+    for env, domain in (("PROD", "api.kroger.com"), ("CERT", "api-ce.kroger.com"))
+}
+
 
 # ─── Argument Parsing ────────────────────────────────────────────────────────
 
 
-def parse_args(argv=None):
-    """Parse command-line arguments.
+def _positive_int(value: str) -> int:
+    """argparse type for integers >= 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid integer: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
 
-    Args:
-        argv: Argument list (default: sys.argv[1:]). Testable.
+
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser.
+
+    Defaults that come from environment variables are filled in by
+    parse_args() on each call, not here.
     """
     parser = argparse.ArgumentParser(
         description="Kroger Cart CLI — Add grocery items to your Kroger/Smith's cart.",
@@ -83,9 +113,15 @@ Examples:
     # Options
     parser.add_argument(
         "--zip",
-        default=os.environ.get("KROGER_ZIP", "84045"),
+        default="84045",
         help="Zip code for store lookup (default: 84045)",
     )
+    parser.add_argument(
+        "--location-id",
+        default=None,
+        metavar="ID",
+        help="Store location ID to use, skipping the zip code lookup.",
+    )
     parser.add_argument(
         "--modality",
         choices=["DELIVERY", "PICKUP"],
@@ -95,7 +131,7 @@ Examples:
     parser.add_argument(
         "--env",
         choices=["PROD", "CERT"],
-        default=os.environ.get("KROGER_ENV", "PROD").upper(),
+        default="PROD",
         help="Kroger API environment (default: PROD)",
     )
     parser.add_argument(
@@ -121,32 +157,82 @@ Examples:
     )
     parser.add_argument(
         "--token-storage",
-        choices=["auto", "file", "keyring"],
+        choices=_TOKEN_STORAGE_CHOICES,
         default="auto",
-        help="Token storage backend (default: auto-detect).",
+        help="Token storage backend (default: auto-detect, or $KROGER_TOKEN_STORAGE).",
     )
     parser.add_argument(
         "--cart",
         action="store_true",
         help="Show current cart contents and exit.",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=_positive_int,
+        default=api.DEFAULT_SEARCH_WORKERS,
+        metavar="N",
+        help=f"Maximum product searches in flight at once (default: {api.DEFAULT_SEARCH_WORKERS}).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore and don't update the saved product and location caches.",
+    )
     parser.add_argument(
         "--setup",
         action="store_true",
         help="Interactive setup: configure API credentials.",
     )
 
-    return parser.parse_args(argv)
+    return parser
+
+
+_PARSER = None
+
+
+def _env_defaults() -> dict:
+    """Argument defaults that can be overridden by environment variables."""
+    return {
+        "zip": os.environ.get("KROGER_ZIP", "84045"),
+        "location_id": os.environ.get("KROGER_LOCATION_ID"),
+        "env": os.environ.get("KROGER_ENV", "PROD").upper(),
+        "token_storage": os.environ.get("KROGER_TOKEN_STORAGE", "auto").lower(),
+    }
+
+
+def parse_args(argv=None):
+    """Parse command-line arguments.
+
+    The parser is built once per process and reused. Environment-backed
+    defaults are re-read on every call so values loaded from .env apply.
+
+    Args:
+        argv: Argument list (default: sys.argv[1:]). Testable.
+    """
+    global _PARSER
+    if _PARSER is None:
+        _PARSER = _build_parser()
+    _PARSER.set_defaults(**_env_defaults())
+    args = _PARSER.parse_args(argv)
+    # argparse only checks choices for values given on the command line
+    if args.token_storage not in _TOKEN_STORAGE_CHOICES:
+        _PARSER.error(
+            f"KROGER_TOKEN_STORAGE must be one of {', '.join(_TOKEN_STORAGE_CHOICES)}, "
+            f"got {args.token_storage!r}"
+        )
+    return args
 
 
 # ─── Config Directory ────────────────────────────────────────────────────────
 
 
+@lru_cache(maxsize=1)
 def get_config_dir() -> str:
     """Get the configuration directory path.
 
     Uses ~/.config/kroger-cart/ on all platforms.
-    Creates the directory if it doesn't exist.
+    Creates the directory if it doesn't exist. The path is resolved once
+    per process, since main(), build_config() and run_setup() all ask.
     """
     config_dir = os.path.join(os.path.expanduser("~"), ".config", "kroger-cart")
     os.makedirs(config_dir, exist_ok=True)
@@ -227,29 +313,76 @@ def setup_logging(json_mode: bool):
 def load_items_from_csv(filename: str) -> list[dict]:
     """Load items from a CSV file.
 
-    Supports columns: query, name, upc, quantity.
+    Supports columns: query, name, upc, quantity. Column positions are read
+    from the header once, so rows are parsed as plain lists.
     """
+    import csv
+
     items = []
-    with open(filename, "r") as f:
-        reader = csv.DictReader(f)
+    with open(filename, "r", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return items
+        columns = {name: index for index, name in enumerate(header)}
+        quantity_index = columns.get("quantity")
+
+        # Pick the search column once: query, then upc, then name (as query)
+        key_field, key_index = None, None
+        for column, field in (("query", "query"), ("upc", "upc"), ("name", "query")):
+            if column in columns:
+                key_field, key_index = field, columns[column]
+                break
+
         for row in reader:
+            if not row:
+                continue
             item = {}
-            if "query" in row:
-                item["query"] = row["query"]
-            elif "upc" in row:
-                item["upc"] = row["upc"]
-            elif "name" in row:
-                item["query"] = row["name"]
-
-            if "quantity" in row and row["quantity"]:
-                item["quantity"] = int(row["quantity"])
-            else:
-                item["quantity"] = 1
+            if key_field:
+                item[key_field] = _csv_cell(row, key_index)
+
+            quantity = _csv_cell(row, quantity_index)
+            item["quantity"] = int(quantity) if quantity else 1
 
             items.append(item)
     return items
 
 
+def _csv_cell(row: list[str], index: int | None) -> str | None:
+    """Return a CSV cell by column index, or None if the row is too short."""
+    if index is None or index >= len(row):
+        return None
+    return row[index]
+
+
+def _check_items(items: list, source: str) -> list[dict]:
+    """Validate parsed JSON items and fill in default quantities.
+
+    Catches malformed input up front instead of failing midway through
+    process_items. A numeric UPC is converted to a string.
+    """
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise ValueError(f"{source} item {index} must be an object, got: {item!r}")
+        upc = item.get("upc")
+        if isinstance(upc, int) and not isinstance(upc, bool):
+            item["upc"] = str(upc)
+        for key in ("query", "upc", "name"):
+            value = item.get(key)
+            if value is not None and not (isinstance(value, str) and value.strip()):
+                raise ValueError(
+                    f"{source} item {index} {key} must be a non-empty string: {item!r}"
+                )
+        if not (item.get("query") or item.get("upc") or item.get("name")):
+            raise ValueError(f"{source} item {index} needs a query, upc, or name: {item!r}")
+        quantity = item.setdefault("quantity", 1)
+        if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity < 1:
+            raise ValueError(
+                f"{source} item {index} quantity must be a positive integer: {item!r}"
+            )
+    return items
+
+
 def load_items(args) -> list[dict]:
     """Load items from whichever input method was specified."""
     if args.items:
@@ -257,25 +390,23 @@ def load_items(args) -> list[dict]:
 
     if args.json_input:
         try:
-            items = json.loads(args.json_input)
+            items = _json.loads(args.json_input)
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON in --json: {e}") from e
         if not isinstance(items, list):
             raise ValueError("--json must be a JSON array, e.g. '[{\"query\": \"milk\"}]'")
-        for item in items:
-            item.setdefault("quantity", 1)
-        return items
+        return _check_items(items, "--json")
 
     if args.stdin:
         try:
-            items = json.loads(sys.stdin.read())
+            # Parse raw bytes; the JSON decoder handles UTF-8 itself
+            stdin = getattr(sys.stdin, "buffer", sys.stdin)
+            items = _json.loads(stdin.read())
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON from stdin: {e}") from e
         if not isinstance(items, list):
             raise ValueError("stdin must contain a JSON array")
-        for item in items:
-            item.setdefault("quantity", 1)
-        return items
+        return _check_items(items, "stdin")
 
     if args.csv_file:
         return load_items_from_csv(args.csv_file)
@@ -286,15 +417,33 @@ def load_items(args) -> list[dict]:
 # ─── Item Processing ─────────────────────────────────────────────────────────
 
 
+def _match(info: dict) -> dict:
+    """Reduce product info to the fields safe to cache: which product matched."""
+    return {"upc": info["upc"], "name": info["name"]}
+
+
+def _cached_match(entry) -> dict | None:
+    """Return the product match from a cache entry, or None if unusable.
+
+    Older caches stored full product info; price and stock from those are
+    dropped rather than reported as current.
+    """
+    if not isinstance(entry, dict) or "upc" not in entry:
+        return None
+    return {"upc": entry["upc"], "name": entry.get("name", entry["upc"])}
+
+
 def process_items(
     session, access_token: str, api_base: str, items: list[dict],
     zip_code: str, modality: str, dry_run: bool = False,
-    location_id: str | None = None,
+    location_id: str | None = None, max_workers: int = api.DEFAULT_SEARCH_WORKERS,
+    product_cache: JsonCache | None = None,
 ) -> tuple[list[dict], list[str], str]:
     """Search for items and add them to the cart.
 
-    Searches are done individually (each item needs its own query), but
-    cart additions are batched into a single API call for efficiency.
+    Searches are done individually (each item needs its own query) but run
+    concurrently. Cart additions are batched into as few API calls as
+    possible (up to CART_BATCH_SIZE items each).
 
     Args:
         session: HTTP session.
@@ -305,6 +454,12 @@ def process_items(
         modality: DELIVERY or PICKUP.
         dry_run: If True, search but don't add to cart.
         location_id: Optional pre-resolved location ID.
+        max_workers: Maximum number of concurrent product searches.
+        product_cache: Optional persistent cache of query -> product matches.
+            Cached queries skip the search request and are reported with
+            "cached": True and without price, sale or stock fields; new
+            matches are added. Entries for items in a
+            failed cart batch are removed.
 
     Returns:
         Tuple of (added_items, not_found_queries, location_id).
@@ -316,55 +471,96 @@ def process_items(
     not_found = []
 
     mode_label = "DRY RUN" if dry_run else modality
-    logger.info(f"\nProcessing {len(items)} items ({mode_label})...\n")
-
-    # Phase 1: Search for all items
-    for item in items:
-        query = item.get("query") or item.get("upc") or item.get("name")
+    logger.info("\nProcessing %d items (%s)...\n", len(items), mode_label)
+
+    # Phase 1: Search for all items concurrently, skipping cached matches
+    queries = [item.get("query") or item.get("upc") or item.get("name") for item in items]
+    infos = [None] * len(queries)
+    if product_cache is not None:
+        for index, query in enumerate(queries):
+            infos[index] = _cached_match(product_cache.get(product_cache_key(location_id, query)))
+    cached = [info is not None for info in infos]
+
+    # Search each distinct query once; repeated items share the match
+    misses = [index for index, info in enumerate(infos) if info is None]
+    unique_queries = {}
+    for index in misses:
+        unique_queries.setdefault(normalize_query(queries[index]), queries[index])
+    results = dict(zip(unique_queries, api.search_products(
+        session, access_token, api_base, list(unique_queries.values()), location_id,
+        max_workers=max_workers,
+    )))
+
+    matches = {}
+    for key, products in results.items():
+        if products:
+            matches[key] = api.extract_product_info(products[0])
+            if product_cache is not None:
+                product_cache.set(
+                    product_cache_key(location_id, unique_queries[key]), _match(matches[key])
+                )
+    for index in misses:
+        infos[index] = matches.get(normalize_query(queries[index]))
+
+    for item, query, info, from_cache in zip(items, queries, infos, cached):
         quantity = item.get("quantity", 1)
 
-        logger.info(f"Searching for: {query}...")
-        products = api.search_product(session, access_token, api_base, query, location_id)
-
-        if not products:
-            logger.info(f"  ❌ Not found: {query}")
+        logger.info("Searching for: %s...", query)
+        if info is None:
+            logger.info("  ❌ Not found: %s", query)
             not_found.append(query)
             continue
 
-        product = products[0]
-        info = api.extract_product_info(product)
         upc = info["upc"]
         name = info["name"]
-        logger.info(f"  ✓ Found: {name} (UPC: {upc})")
+        source = " [cached]" if from_cache else ""
+        logger.info("  ✓ Found: %s (UPC: %s)%s", name, upc, source)
 
         item_data = {"name": name, "upc": upc, "quantity": quantity, "query": query}
-        if "price" in info:
-            item_data["price"] = info["price"]
-        if "promo_price" in info:
-            item_data["promo_price"] = info["promo_price"]
-        if info.get("on_sale"):
-            item_data["on_sale"] = True
-            item_data["savings"] = info.get("savings", 0)
-            item_data["savings_pct"] = info.get("savings_pct", 0)
+        if from_cache:
+            # Only the match is cached: price, sale status and stock are unknown
+            item_data["cached"] = True
         else:
-            item_data["on_sale"] = False
-        if "in_stock" in info:
-            item_data["in_stock"] = info["in_stock"]
+            if "price" in info:
+                item_data["price"] = info["price"]
+            if "promo_price" in info:
+                item_data["promo_price"] = info["promo_price"]
+            if info.get("on_sale"):
+                item_data["on_sale"] = True
+                item_data["savings"] = info.get("savings", 0)
+                item_data["savings_pct"] = info.get("savings_pct", 0)
+            else:
+                item_data["on_sale"] = False
+            if "in_stock" in info:
+                item_data["in_stock"] = info["in_stock"]
         found.append(item_data)
 
-    # Phase 2: Batch add all found items to cart in a single API call
+    # Phase 2: Batch add all found items to cart, CART_BATCH_SIZE items per call
     if found and not dry_run:
-        try:
-            api.add_to_cart_batch(session, access_token, api_base, found, modality)
-            logger.info(f"\n  ✓ Added {len(found)} items to cart in one batch")
-        except Exception as e:
-            logger.info(f"\n  ❌ Batch cart add failed: {e}")
-            # Move all found items to not_found on batch failure
-            not_found.extend(item["query"] for item in found)
-            found = []
+        added = []
+        batch_count = 0
+        for start in range(0, len(found), api.CART_BATCH_SIZE):
+            batch = found[start:start + api.CART_BATCH_SIZE]
+            try:
+                api.add_to_cart_batch(session, access_token, api_base, batch, modality)
+                added.extend(batch)
+                batch_count += 1
+            except Exception as e:
+                logger.info("\n  ❌ Batch cart add failed: %s", e)
+                # Move this batch's items to not_found on failure
+                not_found.extend(item["query"] for item in batch)
+                # A saved match may be what failed (e.g. a discontinued UPC);
+                # forget the batch so the next run searches these items fresh
+                if product_cache is not None:
+                    for item in batch:
+                        product_cache.delete(product_cache_key(location_id, item["query"]))
+        if added:
+            noun = "batch" if batch_count == 1 else "batches"
+            logger.info("\n  ✓ Added %d items to cart in %d %s", len(added), batch_count, noun)
+        found = added
     elif dry_run and found:
         for item in found:
-            logger.info(f"  🔍 Would add: {item['name']} (x{item['quantity']}) — DRY RUN")
+            logger.info("  🔍 Would add: %s (x%s) — DRY RUN", item["name"], item["quantity"])
 
     return found, not_found, location_id
 
@@ -374,17 +570,23 @@ def process_items(
 
 def _format_price_str(item: dict) -> str:
     """Format price string with promo pricing and savings."""
-    if not item.get("price"):
+    price = item.get("price")
+    if not price:
         return ""
-    if item.get("on_sale") and item.get("promo_price"):
-        savings = item.get("savings", 0)
+    promo = item.get("promo_price")
+    if promo and item.get("on_sale"):
         pct = item.get("savings_pct", 0)
         hot = " 🔥" if pct >= 20 else ""
         return (
-            f" — ${item['price']:.2f} → ${item['promo_price']:.2f}"
-            f" (SAVE ${savings:.2f}, {pct}%){hot}"
+            f" — ${price:.2f} → ${promo:.2f}"
+            f" (SAVE ${item.get('savings', 0):.2f}, {pct}%){hot}"
         )
-    return f" — ${item['price']:.2f}"
+    return f" — ${price:.2f}"
+
+
+def _total_savings(deals: list) -> float:
+    """Sum the savings on sale items, counting each unit bought."""
+    return sum(i.get("savings", 0) * i.get("quantity", 1) for i in deals)
 
 
 def _deal_summary(added: list) -> str | None:
@@ -392,46 +594,47 @@ def _deal_summary(added: list) -> str | None:
     deals = [i for i in added if i.get("on_sale")]
     if not deals:
         return None
-    total = sum(i.get("savings", 0) * i.get("quantity", 1) for i in deals)
-    return f"💰 {len(deals)} item(s) on sale — total savings: ${total:.2f}"
+    return f"💰 {len(deals)} item(s) on sale — total savings: ${_total_savings(deals):.2f}"
 
 
 def print_text_summary(
     added: list, not_found: list, modality: str, dry_run: bool, deals_mode: bool = False,
 ):
-    """Print human-readable summary."""
-    print("\n" + "=" * 50)
+    """Print human-readable summary.
+
+    The summary is assembled first and written to stdout in one call.
+    """
     if deals_mode:
         label = "DEALS CHECK"
     elif dry_run:
         label = "SUMMARY (DRY RUN)"
     else:
         label = "SUMMARY"
-    print(label)
-    print("=" * 50)
+    lines = ["", "=" * 50, label, "=" * 50]
 
     verb = "Deals found for" if deals_mode else ("Would add" if dry_run else "Successfully added")
-    print(f"\n✓ {verb} ({len(added)}):")
+    lines.append(f"\n✓ {verb} ({len(added)}):")
     for item in added:
-        print(f"  - {item['name']} (x{item['quantity']}){_format_price_str(item)}")
+        lines.append(f"  - {item['name']} (x{item['quantity']}){_format_price_str(item)}")
 
     if not_found:
-        print(f"\n✗ Not found or failed ({len(not_found)}):")
+        lines.append(f"\n✗ Not found or failed ({len(not_found)}):")
         for item in not_found:
-            print(f"  - {item}")
+            lines.append(f"  - {item}")
 
     deal_line = _deal_summary(added)
     if deal_line:
-        print(f"\n{deal_line}")
+        lines.append(f"\n{deal_line}")
 
-    if deals_mode or dry_run:
-        if deals_mode:
-            print(f"\n🔍 Deals check complete — no items were added to cart.")
-        else:
-            print(f"\n🔍 Dry run complete — no items were added to cart.")
+    if deals_mode:
+        lines.append("\n🔍 Deals check complete — no items were added to cart.")
+    elif dry_run:
+        lines.append("\n🔍 Dry run complete — no items were added to cart.")
     else:
-        print(f"\n🛒 View your cart: https://www.smithsfoodanddrug.com/cart")
-        print("   (Complete checkout manually in your browser)")
+        lines.append("\n🛒 View your cart: https://www.smithsfoodanddrug.com/cart")
+        lines.append("   (Complete checkout manually in your browser)")
+
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def print_json_result(
@@ -439,7 +642,6 @@ def print_json_result(
 ):
     """Print machine-readable JSON result."""
     deals = [i for i in added if i.get("on_sale")]
-    total_savings = sum(i.get("savings", 0) * i.get("quantity", 1) for i in deals)
     result = {
         "success": True,
         "dry_run": dry_run,
@@ -449,40 +651,38 @@ def print_json_result(
         "added_count": len(added),
         "not_found_count": len(not_found),
         "deals_count": len(deals),
-        "total_savings": round(total_savings, 2),
+        "total_savings": round(_total_savings(deals), 2),
         "cart_url": "https://www.smithsfoodanddrug.com/cart",
         "modality": modality,
     }
-    print(json.dumps(result, indent=2))
+    print(_json.dumps(result, pretty=True))
 
 
 def print_cart_text(cart_items: list):
-    """Print human-readable cart contents."""
-    print("\n" + "=" * 50)
-    print("CURRENT CART")
-    print("=" * 50)
+    """Print human-readable cart contents in a single write."""
+    lines = ["", "=" * 50, "CURRENT CART", "=" * 50]
 
     if not cart_items:
-        print("\n🛒 Your cart is empty.")
-        return
-
-    print(f"\n🛒 {len(cart_items)} item(s) in cart:")
-    for item in cart_items:
-        upc = item.get("upc", "?")
-        qty = item.get("quantity", 1)
-        print(f"  - UPC {upc} (x{qty})")
+        lines.append("\n🛒 Your cart is empty.")
+    else:
+        lines.append(f"\n🛒 {len(cart_items)} item(s) in cart:")
+        lines.extend(
+            f"  - UPC {item.get('upc', '?')} (x{item.get('quantity', 1)})"
+            for item in cart_items
+        )
+        lines.append("\n🔗 https://www.smithsfoodanddrug.com/cart")
 
-    print(f"\n🔗 https://www.smithsfoodanddrug.com/cart")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def print_cart_json(cart_items: list):
     """Print machine-readable cart contents."""
-    print(json.dumps({
+    print(_json.dumps({
         "success": True,
         "cart_items": cart_items,
         "item_count": len(cart_items),
         "cart_url": "https://www.smithsfoodanddrug.com/cart",
-    }, indent=2))
+    }, pretty=True))
 
 
 
@@ -491,32 +691,32 @@ def print_cart_json(cart_items: list):
 
 def build_config(args) -> dict:
     """Build configuration dict from environment and CLI args."""
-    env = args.env
-    base_domain = "api-ce.kroger.com" if env == "CERT" else "api.kroger.com"
+    urls = _API_URLS["CERT" if args.env == "CERT" else "PROD"]
     config_dir = get_config_dir()
 
     return {
         "client_id": os.environ.get("KROGER_CLIENT_ID", ""),
         "client_secret": os.environ.get("KROGER_CLIENT_SECRET", ""),
         "redirect_uri": os.environ.get("KROGER_REDIRECT_URI", "http://localhost:3000"),
-        "auth_url": f"https://{base_domain}/v1/connect/oauth2/authorize",
-        "token_url": f"https://{base_domain}/v1/connect/oauth2/token",
-        "api_base": f"https://{base_domain}/v1",
+        **urls,
         "token_file": os.path.join(config_dir, "tokens.json"),
+        "product_cache_file": os.path.join(config_dir, "product_cache.json"),
+        "location_cache_file": os.path.join(config_dir, "location_cache.json"),
     }
 
 
 def main(argv=None):
     """Main entry point."""
+    # Heavier imports are deferred to keep --help/--version fast
+    from dotenv import load_dotenv
+
     # Load .env from config directory first, then fall back to project directory
     config_dir = get_config_dir()
     config_env = os.path.join(config_dir, ".env")
-    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    project_env = os.path.join(project_dir, ".env")
 
     # Config dir takes priority; project dir is fallback for backward compat
     load_dotenv(config_env)
-    load_dotenv(project_env)  # Won't override already-set vars
+    load_dotenv(_PROJECT_ENV)  # Won't override already-set vars
 
     args = parse_args(argv)
     json_mode = args.output == "json"
@@ -527,8 +727,13 @@ def main(argv=None):
         run_setup()
         return
 
+    import requests
+    from kroger_cart.session import POOL_MAXSIZE, create_session
+    from kroger_cart.auth import TokenManager, get_storage_backend
+
     config = build_config(args)
-    session = create_session()
+    # One pooled connection per concurrent search thread
+    session = create_session(pool_maxsize=max(POOL_MAXSIZE, args.concurrency))
 
     # Resolve storage backend
     force_storage = None if args.token_storage == "auto" else args.token_storage
@@ -541,7 +746,7 @@ def main(argv=None):
         token_mgr.get_access_token()
         logger.info("Authentication successful! Tokens saved.")
         if json_mode:
-            print(json.dumps({"success": True, "message": "Authenticated successfully."}))
+            print(_json.dumps({"success": True, "message": "Authenticated successfully."}))
         return
 
     # Cart view mode
@@ -557,7 +762,7 @@ def main(argv=None):
             _handle_connection_error(json_mode)
         except Exception as e:
             if json_mode:
-                print(json.dumps({"success": False, "error": str(e)}))
+                print(_json.dumps({"success": False, "error": str(e)}))
                 sys.exit(1)
             else:
                 print(f"\n❌ Error: {e}")
@@ -570,7 +775,7 @@ def main(argv=None):
     except ValueError as e:
         print(f"Error: {e}\n", file=sys.stderr)
         if json_mode:
-            print(json.dumps({"success": False, "error": str(e)}))
+            print(_json.dumps({"success": False, "error": str(e)}))
         sys.exit(1)
 
     if not items:
@@ -581,13 +786,30 @@ def main(argv=None):
         print("  echo '[{\"query\": \"eggs\"}]' | kroger-cart --stdin", file=sys.stderr)
         print("  kroger-cart groceries.csv", file=sys.stderr)
         if json_mode:
-            print(json.dumps({"success": False, "error": "No items provided."}))
+            print(_json.dumps({"success": False, "error": "No items provided."}))
         sys.exit(1)
 
     # --deals implies --dry-run
     deals_mode = args.deals
     dry_run = args.dry_run or deals_mode
 
+    # --deals is about current prices, so it always searches fresh
+    product_cache = None
+    if not args.no_cache and not deals_mode:
+        product_cache = JsonCache(config["product_cache_file"], PRODUCT_CACHE_TTL)
+
+    # Store for a zip rarely changes; reuse the last lookup unless overridden
+    location_id = args.location_id
+    location_cache = None
+    location_key = location_cache_key(config["api_base"], args.zip)
+    if not location_id and not args.no_cache:
+        location_cache = JsonCache(config["location_cache_file"], LOCATION_CACHE_TTL)
+        location_id = location_cache.get(location_key)
+        if location_id:
+            logger.info("Using saved store %s for zip %s (--no-cache to look it up again)",
+                        location_id, args.zip)
+    cached_location_id = location_id
+
     try:
         access_token = token_mgr.get_access_token()
         added, not_found, location_id = process_items(
@@ -598,7 +820,25 @@ def main(argv=None):
             zip_code=args.zip,
             modality=args.modality,
             dry_run=dry_run,
+            location_id=location_id,
+            max_workers=args.concurrency,
+            product_cache=product_cache,
         )
+        if location_cache is not None:
+            if location_id != cached_location_id:
+                location_cache.set(location_key, location_id)
+                location_cache.save()
+            elif cached_location_id and not added:
+                # A saved store that has closed or been renumbered makes every
+                # search fail; forget it so the next run looks the store up again
+                logger.warning(
+                    "Nothing found at saved store %s; it will be looked up again next run",
+                    cached_location_id,
+                )
+                location_cache.delete(location_key)
+                location_cache.save()
+        if product_cache is not None:
+            product_cache.save()
 
         if json_mode:
             print_json_result(added, not_found, args.modality, dry_run, deals_mode)
@@ -609,7 +849,7 @@ def main(argv=None):
         _handle_connection_error(json_mode)
     except Exception as e:
         if json_mode:
-            print(json.dumps({"success": False, "error": str(e)}))
+            print(_json.dumps({"success": False, "error": str(e)}))
             sys.exit(1)
         else:
             print(f"\n❌ Error: {e}")
@@ -620,7 +860,7 @@ def _handle_connection_error(json_mode: bool):
     """Handle network connection errors with a user-friendly message."""
     msg = "Network error: could not connect to the Kroger API. Check your internet connection."
     if json_mode:
-        print(json.dumps({"success": False, "error": msg}))
+        print(_json.dumps({"success": False, "error": msg}))
     else:
         print(f"\n❌ {msg}")
     sys.exit(1)
@@ -1,5 +1,5 @@
 """
-Requests session with retry and exponential backoff.
+Requests session with retry, exponential backoff, and connection pooling.
 Handles transient errors (429, 500, 502, 503, 504) automatically.
 """
 
@@ -10,12 +10,21 @@ from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
+# Keep-alive connections kept open per host; sized for concurrent searches
+POOL_MAXSIZE = 20
 
-def create_session() -> requests.Session:
+
+def create_session(pool_maxsize: int = POOL_MAXSIZE) -> requests.Session:
     """Create a requests session with retry logic.
 
     Retries up to 3 times with exponential backoff (1s, 2s, 4s)
-    on rate-limit (429) and server error (5xx) responses.
+    on rate-limit (429) and server error (5xx) responses. Connections are
+    kept alive and pooled (up to pool_maxsize per host) so concurrent
+    requests reuse warm TLS connections instead of re-handshaking.
+
+    Args:
+        pool_maxsize: Connections kept per host. Should be at least the
+            number of threads sharing the session.
     """
     session = requests.Session()
     retry = Retry(
@@ -25,9 +34,11 @@ def create_session() -> requests.Session:
         allowed_methods=["GET", "PUT", "POST"],
         raise_on_status=False,
     )
-    adapter = HTTPAdapter(max_retries=retry)
+    adapter = HTTPAdapter(max_retries=retry, pool_maxsize=pool_maxsize)
     session.mount("https://", adapter)
     session.mount("http://", adapter)
 
-    logger.debug("HTTP session created with retry (3 attempts, backoff=1s)")
+    logger.debug(
+        "HTTP session created with retry (3 attempts, backoff=1s), pool size %d", pool_maxsize
+    )
     return session
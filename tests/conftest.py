@@ -0,0 +1,56 @@
+"""Shared pytest fixtures."""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+
+from kroger_cart import api, auth, cli
+
+
+@pytest.fixture(autouse=True)
+def _clear_caches():
+    """Keep in-process caches from leaking between tests."""
+    api.clear_caches()
+    auth._keyring_available.cache_clear()
+    cli.get_config_dir.cache_clear()
+    yield
+    api.clear_caches()
+    auth._keyring_available.cache_clear()
+    cli.get_config_dir.cache_clear()
+
+
+@pytest.fixture
+def make_resp():
+    """Factory for lightweight HTTP response stand-ins.
+
+    The body is taken from `content` if given, else `json_body` serialized,
+    else empty (as with a 204). raise_for_status() is a no-op.
+    """
+    def _make(json_body=None, status=200, content=None):
+        if content is None:
+            content = json.dumps(json_body).encode() if json_body is not None else b""
+        return SimpleNamespace(
+            status_code=status,
+            content=content,
+            json=lambda: json_body,
+            raise_for_status=lambda: None,
+        )
+    return _make
+
+
+@pytest.fixture
+def fake_session():
+    """Factory for HTTP session stand-ins limited to get/put/post.
+
+    Keyword arguments set each method's return value, e.g.
+    fake_session(get=make_resp({...})). Touching any other attribute
+    raises, so a test can't silently depend on an unmocked call.
+    """
+    def _make(**method_returns):
+        session = Mock(spec_set=["get", "put", "post"])
+        for method, response in method_returns.items():
+            getattr(session, method).return_value = response
+        return session
+    return _make
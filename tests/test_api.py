@@ -1,99 +1,158 @@
 """Tests for the API module."""
 
-import json
-from unittest.mock import MagicMock
+from unittest.mock import patch
 
 import pytest
 
 from kroger_cart.api import find_location, search_product, add_to_cart, extract_product_info
 
 
+PROMO_PRODUCT = {
+    "upc": "001111",
+    "description": "Kroger Milk",
+    "brand": "Kroger",
+    "items": [{
+        "price": {"regular": 3.99, "promo": 2.99},
+        "fulfillment": {"inStock": True},
+    }],
+}
+
+NO_PROMO_PRODUCT = {
+    "upc": "002222",
+    "description": "Eggs",
+    "brand": "Store",
+    "items": [{
+        "price": {"regular": 2.79},
+        "fulfillment": {"inStock": True},
+    }],
+}
+
+NATIONAL_PRODUCT = {
+    "upc": "003333",
+    "description": "Bread",
+    "brand": "Wonder",
+    "items": [{
+        "price": {"regular": 3.29, "promo": 2.50},
+        "nationalPrice": {"regular": 3.49, "promo": 2.99},
+        "fulfillment": {"inStock": True},
+    }],
+}
+
+NO_ITEMS_PRODUCT = {
+    "upc": "004444",
+    "description": "Mystery Item",
+}
+
+# Marks a field that extract_product_info must leave out
+MISSING = object()
+
+
 class TestFindLocation:
     """Test location lookup."""
 
-    def test_returns_location_id(self):
-        session = MagicMock()
-        response = MagicMock()
-        response.json.return_value = {
-            "data": [
-                {
-                    "locationId": "01400376",
-                    "name": "Smith's",
-                    "address": {
-                        "addressLine1": "123 Main St",
-                        "city": "Lehi",
-                    },
-                }
-            ]
-        }
-        response.raise_for_status = MagicMock()
-        session.get.return_value = response
+    LOCATIONS = {
+        "data": [
+            {
+                "locationId": "01400376",
+                "name": "Smith's",
+                "address": {
+                    "addressLine1": "123 Main St",
+                    "city": "Lehi",
+                },
+            }
+        ]
+    }
+
+    def test_returns_location_id(self, make_resp, fake_session):
+        session = fake_session(get=make_resp(self.LOCATIONS))
 
         result = find_location(session, "token", "https://api.kroger.com/v1", "84045")
         assert result == "01400376"
 
-    def test_raises_when_no_locations(self):
-        session = MagicMock()
-        response = MagicMock()
-        response.json.return_value = {"data": []}
-        response.raise_for_status = MagicMock()
-        session.get.return_value = response
+    def test_raises_when_no_locations(self, make_resp, fake_session):
+        session = fake_session(get=make_resp({"data": []}))
 
         with pytest.raises(Exception, match="No Smiths locations found"):
             find_location(session, "token", "https://api.kroger.com/v1", "00000")
 
+    def test_expired_cache_entry_refetches(self, make_resp, fake_session):
+        session = fake_session(get=make_resp(self.LOCATIONS))
+
+        with patch("kroger_cart.api.time.monotonic", side_effect=[0, 10, 10_000, 10_000]):
+            find_location(session, "token", "https://api.kroger.com/v1", "84045")
+            find_location(session, "token", "https://api.kroger.com/v1", "84045")
+            find_location(session, "token", "https://api.kroger.com/v1", "84045")
+        assert session.get.call_count == 2
+
 
 class TestSearchProduct:
     """Test product search."""
 
-    def test_returns_product_list(self):
-        session = MagicMock()
-        response = MagicMock()
-        response.json.return_value = {
+    def test_returns_product_list(self, make_resp, fake_session):
+        session = fake_session(get=make_resp({
             "data": [
                 {"upc": "001111", "description": "Milk"},
                 {"upc": "002222", "description": "Milk 2%"},
             ]
-        }
-        response.raise_for_status = MagicMock()
-        session.get.return_value = response
+        }))
 
         results = search_product(session, "token", "https://api.kroger.com/v1", "milk", "loc1")
         assert len(results) == 2
         assert results[0]["upc"] == "001111"
 
-    def test_returns_empty_on_no_match(self):
-        session = MagicMock()
-        response = MagicMock()
-        response.json.return_value = {"data": []}
-        response.raise_for_status = MagicMock()
-        session.get.return_value = response
+    def test_returns_empty_on_no_match(self, make_resp, fake_session):
+        session = fake_session(get=make_resp({"data": []}))
 
         results = search_product(session, "token", "https://api.kroger.com/v1", "xyz", "loc1")
         assert results == []
 
+    def test_repeat_search_uses_cache(self, make_resp, fake_session):
+        session = fake_session(get=make_resp({"data": [{"upc": "001111", "description": "Milk"}]}))
+
+        first = search_product(session, "token", "https://api.kroger.com/v1", "milk", "loc1")
+        second = search_product(session, "token", "https://api.kroger.com/v1", "milk", "loc1")
+        assert first == second
+        assert session.get.call_count == 1
+
+    def test_empty_results_are_not_cached(self, make_resp, fake_session):
+        session = fake_session(get=make_resp({"data": []}))
+
+        search_product(session, "token", "https://api.kroger.com/v1", "xyz", "loc1")
+        search_product(session, "token", "https://api.kroger.com/v1", "xyz", "loc1")
+        assert session.get.call_count == 2
+
+
+class TestCache:
+    """Test the in-process TTL cache helpers."""
+
+    def test_concurrent_sets_at_capacity(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from kroger_cart import api
+
+        cache = {}
+
+        def fill(worker):
+            for i in range(2000):
+                api._cache_set(cache, (worker, i), i, ttl=60)
+
+        with patch("kroger_cart.api._CACHE_MAXSIZE", 8):
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(fill, range(8)))
+
+        assert len(cache) == 8
+
 
 class TestAddToCart:
     """Test cart addition."""
 
-    def test_handles_204_no_content(self):
-        session = MagicMock()
-        response = MagicMock()
-        response.content = b""  # Empty body
-        response.status_code = 204
-        response.raise_for_status = MagicMock()
-        session.put.return_value = response
+    def test_handles_204_no_content(self, make_resp, fake_session):
+        session = fake_session(put=make_resp(status=204))  # Empty body
 
         result = add_to_cart(session, "token", "https://api.kroger.com/v1", "001111")
         assert result["status"] == 204
 
-    def test_handles_json_response(self):
-        session = MagicMock()
-        response = MagicMock()
-        response.content = b'{"status": "ok"}'
-        response.json.return_value = {"status": "ok"}
-        response.raise_for_status = MagicMock()
-        session.put.return_value = response
+    def test_handles_json_response(self, make_resp, fake_session):
+        session = fake_session(put=make_resp(content=b'{"status": "ok"}'))
 
         result = add_to_cart(session, "token", "https://api.kroger.com/v1", "001111", 2, "PICKUP")
         assert result == {"status": "ok"}
@@ -102,102 +161,51 @@ class TestAddToCart:
 class TestExtractProductInfo:
     """Test product info extraction with deal/promo fields."""
 
-    def test_with_promo_price(self):
-        product = {
-            "upc": "001111",
-            "description": "Kroger Milk",
-            "brand": "Kroger",
-            "items": [{
-                "price": {"regular": 3.99, "promo": 2.99},
-                "fulfillment": {"inStock": True},
-            }],
-        }
+    @pytest.mark.parametrize("product, expected", [
+        (PROMO_PRODUCT, {
+            "on_sale": True, "price": 3.99, "promo_price": 2.99,
+            "savings": 1.0, "savings_pct": 25, "in_stock": True,
+        }),
+        (NO_PROMO_PRODUCT, {
+            "on_sale": False, "price": 2.79, "promo_price": MISSING, "savings": MISSING,
+        }),
+        (NATIONAL_PRODUCT, {
+            "on_sale": True, "national_price": 3.49, "national_promo": 2.99,
+            "savings": 0.79, "savings_pct": 24,
+        }),
+        (NO_ITEMS_PRODUCT, {"on_sale": False, "price": MISSING}),
+    ], ids=["promo", "no-promo", "national", "no-items"])
+    def test_fields(self, product, expected):
         info = extract_product_info(product)
-        assert info["on_sale"] is True
-        assert info["price"] == 3.99
-        assert info["promo_price"] == 2.99
-        assert info["savings"] == 1.0
-        assert info["savings_pct"] == 25
-        assert info["in_stock"] is True
-
-    def test_without_promo(self):
-        product = {
-            "upc": "002222",
-            "description": "Eggs",
-            "brand": "Store",
-            "items": [{
-                "price": {"regular": 2.79},
-                "fulfillment": {"inStock": True},
-            }],
-        }
-        info = extract_product_info(product)
-        assert info["on_sale"] is False
-        assert info["price"] == 2.79
-        assert "promo_price" not in info
-        assert "savings" not in info
-
-    def test_with_national_pricing(self):
-        product = {
-            "upc": "003333",
-            "description": "Bread",
-            "brand": "Wonder",
-            "items": [{
-                "price": {"regular": 3.29, "promo": 2.50},
-                "nationalPrice": {"regular": 3.49, "promo": 2.99},
-                "fulfillment": {"inStock": True},
-            }],
-        }
-        info = extract_product_info(product)
-        assert info["on_sale"] is True
-        assert info["national_price"] == 3.49
-        assert info["national_promo"] == 2.99
-        assert info["savings"] == 0.79
-        assert info["savings_pct"] == 24
-
-    def test_no_items_array(self):
-        product = {
-            "upc": "004444",
-            "description": "Mystery Item",
-        }
-        info = extract_product_info(product)
-        assert info["on_sale"] is False
-        assert "price" not in info
+        for key, value in expected.items():
+            if value is MISSING:
+                assert key not in info
+            else:
+                assert info[key] == value
 
 
 class TestGetCart:
     """Test cart retrieval."""
 
-    def test_returns_cart_items(self):
-        session = MagicMock()
-        response = MagicMock()
-        response.status_code = 200
-        response.content = b'{"data": [{"upc": "001111", "quantity": 2}]}'
-        response.json.return_value = {"data": [{"upc": "001111", "quantity": 2}]}
-        response.raise_for_status = MagicMock()
-        session.get.return_value = response
+    def test_returns_cart_items(self, make_resp, fake_session):
+        session = fake_session(get=make_resp(
+            content=b'{"data": [{"upc": "001111", "quantity": 2}]}'
+        ))
 
         from kroger_cart.api import get_cart
         result = get_cart(session, "token", "https://api.kroger.com/v1")
         assert len(result) == 1
         assert result[0]["upc"] == "001111"
 
-    def test_returns_empty_on_204(self):
-        session = MagicMock()
-        response = MagicMock()
-        response.status_code = 204
-        response.content = b""
-        response.raise_for_status = MagicMock()
-        session.get.return_value = response
+    def test_returns_empty_on_204(self, make_resp, fake_session):
+        session = fake_session(get=make_resp(status=204))
 
         from kroger_cart.api import get_cart
         result = get_cart(session, "token", "https://api.kroger.com/v1")
         assert result == []
 
-    def test_raises_on_401(self):
-        session = MagicMock()
-        response = MagicMock()
-        response.status_code = 401
-        session.get.return_value = response
+    def test_raises_on_401(self, make_resp, fake_session):
+        session = fake_session(get=make_resp(status=401))
 
         from kroger_cart.api import get_cart
         with pytest.raises(Exception, match="Authentication expired"):
@@ -207,13 +215,8 @@ class TestGetCart:
 class TestAddToCartBatch:
     """Test batch cart addition."""
 
-    def test_handles_204_no_content(self):
-        session = MagicMock()
-        response = MagicMock()
-        response.content = b""
-        response.status_code = 204
-        response.raise_for_status = MagicMock()
-        session.put.return_value = response
+    def test_handles_204_no_content(self, make_resp, fake_session):
+        session = fake_session(put=make_resp(status=204))
 
         from kroger_cart.api import add_to_cart_batch
         result = add_to_cart_batch(
@@ -223,15 +226,26 @@ class TestAddToCartBatch:
         assert result["status"] == 204
 
         # Verify correct payload structure
-        call_args = session.put.call_args
-        payload = call_args.kwargs.get("json") or call_args[1].get("json")
+        payload = session.put.call_args.kwargs["json"]
         assert len(payload["items"]) == 2
 
-    def test_raises_on_401(self):
-        session = MagicMock()
-        response = MagicMock()
-        response.status_code = 401
-        session.put.return_value = response
+    def test_merges_duplicate_upcs(self, make_resp, fake_session):
+        session = fake_session(put=make_resp(status=204))
+
+        from kroger_cart.api import add_to_cart_batch
+        add_to_cart_batch(
+            session, "token", "https://api.kroger.com/v1",
+            [{"upc": "001111", "quantity": 1}, {"upc": "002222"}, {"upc": "001111", "quantity": 2}],
+        )
+
+        payload = session.put.call_args.kwargs["json"]
+        assert payload["items"] == [
+            {"upc": "001111", "quantity": 3},
+            {"upc": "002222", "quantity": 1},
+        ]
+
+    def test_raises_on_401(self, make_resp, fake_session):
+        session = fake_session(put=make_resp(status=401))
 
         from kroger_cart.api import add_to_cart_batch
         with pytest.raises(Exception, match="Authentication expired"):
@@ -241,6 +255,21 @@ class TestAddToCartBatch:
             )
 
 
+class TestHeaders:
+    """Test request header construction."""
+
+    def test_headers_reused_per_token(self):
+        from kroger_cart.api import get_headers
+        assert get_headers("token-a") is get_headers("token-a")
+        assert get_headers("token-b")["Authorization"] == "Bearer token-b"
+
+    def test_json_headers_include_content_type(self):
+        from kroger_cart.api import get_json_headers
+        headers = get_json_headers("token-a")
+        assert headers["Authorization"] == "Bearer token-a"
+        assert headers["Content-Type"] == "application/json"
+
+
 class TestSanitizeQuery:
     """Test query sanitization."""
 
@@ -276,17 +305,64 @@ class TestSimplifyQuery:
         from kroger_cart.api import simplify_query
         assert simplify_query("whole wheat bread") == "whole wheat bread"
 
+    def test_clean_query_returned_unchanged(self):
+        from kroger_cart.api import simplify_query
+        query = "eggs"
+        assert simplify_query(query) is query
+
+
+class TestQueryVariants:
+    """Test search attempt generation."""
+
+    def test_sanitized_then_simplified(self):
+        from kroger_cart.api import query_variants
+        assert query_variants("milk & honey 32 oz") == ["milk honey 32 oz", "milk honey"]
+
+    def test_single_attempt_when_already_simple(self):
+        from kroger_cart.api import query_variants
+        assert query_variants("whole wheat bread") == ["whole wheat bread"]
+
+    def test_empty_query_has_no_attempts(self):
+        from kroger_cart.api import query_variants
+        assert query_variants("&&& ###") == []
+
+    def test_empty_query_skips_request(self, fake_session):
+        session = fake_session()
+        assert search_product(session, "token", "https://api.kroger.com/v1", "@@", "loc1") == []
+        session.get.assert_not_called()
+
 
 class TestSearchProduct401:
     """Test that search_product raises on 401."""
 
-    def test_raises_on_401(self):
-        session = MagicMock()
-        response = MagicMock()
-        response.status_code = 401
-        session.get.return_value = response
+    def test_raises_on_401(self, make_resp, fake_session):
+        session = fake_session(get=make_resp(status=401))
 
         with pytest.raises(Exception, match="Authentication expired"):
             search_product(session, "token", "https://api.kroger.com/v1", "milk", "loc1")
 
 
+class TestSearchProducts:
+    """Test concurrent multi-query search."""
+
+    def test_preserves_query_order(self, make_resp, fake_session):
+        def fake_get(url, headers=None, params=None):
+            term = params["filter.term"]
+            return make_resp({"data": [{"upc": term, "description": term}]})
+
+        session = fake_session()
+        session.get.side_effect = fake_get
+
+        from kroger_cart.api import search_products
+        queries = ["milk", "eggs", "bread", "butter", "cheese", "apples"]
+        results = search_products(
+            session, "token", "https://api.kroger.com/v1", queries, "loc1", max_workers=3
+        )
+        assert [r[0]["upc"] for r in results] == queries
+
+    def test_empty_queries(self, fake_session):
+        from kroger_cart.api import search_products
+        session = fake_session()
+        assert search_products(session, "token", "https://api.kroger.com/v1", [], "loc1") == []
+        session.get.assert_not_called()
+
@@ -6,7 +6,7 @@ import stat
 import platform
 import tempfile
 from datetime import datetime, timedelta
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, Mock, patch
 
 import pytest
 
@@ -18,6 +18,28 @@ from kroger_cart.auth import (
 )
 
 
+class InMemoryStorage:
+    """Token storage test double that keeps tokens in a dict, off disk."""
+
+    def __init__(self, tokens=None):
+        self._tokens = dict(tokens) if tokens else None
+
+    def save(self, tokens: dict):
+        self._tokens = dict(tokens)
+
+    def load(self) -> dict | None:
+        return dict(self._tokens) if self._tokens is not None else None
+
+
+CONFIG = {
+    "client_id": "test-id",
+    "client_secret": "test-secret",
+    "redirect_uri": "http://localhost:3000",
+    "auth_url": "https://api.kroger.com/v1/connect/oauth2/authorize",
+    "token_url": "https://api.kroger.com/v1/connect/oauth2/token",
+}
+
+
 class TestPKCE:
     """Test PKCE code generation."""
 
@@ -40,6 +62,15 @@ class TestPKCE:
         import re
         assert re.match(r'^[A-Za-z0-9_-]+$', verifier)
 
+    def test_challenge_is_s256_of_verifier(self):
+        import base64
+        import hashlib
+        verifier, challenge = generate_pkce()
+        expected = base64.urlsafe_b64encode(
+            hashlib.sha256(verifier.encode()).digest()
+        ).decode().rstrip("=")
+        assert challenge == expected
+
 
 class TestFileStorage:
     """Test file-based token storage."""
@@ -55,6 +86,29 @@ class TestFileStorage:
         assert loaded["access_token"] == "test123"
         assert loaded["refresh_token"] == "ref456"
 
+    def test_save_is_atomic(self, tmp_path):
+        path = tmp_path / "tokens.json"
+        storage = FileStorage(str(path))
+        storage.save({"access_token": "first"})
+        storage.save({"access_token": "second"})
+
+        assert json.loads(path.read_text()) == {"access_token": "second"}
+        assert not (tmp_path / "tokens.json.tmp").exists()
+
+    def test_load_caches_until_file_changes(self, tmp_path):
+        path = tmp_path / "tokens.json"
+        storage = FileStorage(str(path))
+        storage.save({"access_token": "first"})
+        storage.load()
+
+        with patch("kroger_cart.auth._json.loads") as json_loads:
+            assert storage.load() == {"access_token": "first"}
+            json_loads.assert_not_called()
+
+        # Another process rewrites the file
+        path.write_text(json.dumps({"access_token": "rotated-elsewhere"}))
+        assert storage.load() == {"access_token": "rotated-elsewhere"}
+
     def test_load_missing_file(self, tmp_path):
         storage = FileStorage(str(tmp_path / "nonexistent.json"))
         assert storage.load() is None
@@ -83,59 +137,84 @@ class TestStorageBackendDetection:
             backend = get_storage_backend(str(tmp_path / "t.json"))
             assert isinstance(backend, FileStorage)
 
+    def test_keyring_probe_is_cached(self, tmp_path):
+        fake_keyring = MagicMock()
+        fake_keyring.get_keyring.return_value = MagicMock()
+        with patch.dict("sys.modules", {"keyring": fake_keyring}):
+            get_storage_backend(str(tmp_path / "t.json"))
+            get_storage_backend(str(tmp_path / "t.json"))
+        fake_keyring.get_keyring.assert_called_once()
+
 
 class TestTokenManager:
     """Test token management logic."""
 
-    def _make_manager(self, tmp_path, tokens=None):
-        config = {
-            "client_id": "test-id",
-            "client_secret": "test-secret",
-            "redirect_uri": "http://localhost:3000",
-            "auth_url": "https://api.kroger.com/v1/connect/oauth2/authorize",
-            "token_url": "https://api.kroger.com/v1/connect/oauth2/token",
-            "token_file": str(tmp_path / "tokens.json"),
-        }
-        session = MagicMock()
-        storage = FileStorage(config["token_file"])
-        if tokens:
-            storage.save(tokens)
-        return TokenManager(config, session, storage)
-
-    def test_returns_cached_token_if_valid(self, tmp_path):
+    @pytest.fixture
+    def token_manager(self):
+        """Factory for a TokenManager over in-memory tokens and a stub session."""
+        def _make(tokens=None, storage=None):
+            if storage is None:
+                storage = InMemoryStorage(tokens)
+            elif tokens:
+                storage.save(tokens)
+            # TokenManager only ever POSTs to the token endpoint
+            return TokenManager(CONFIG, Mock(spec_set=["post"]), storage)
+        return _make
+
+    def test_returns_cached_token_if_valid(self, token_manager):
         tokens = {
             "access_token": "cached-token",
             "refresh_token": "ref",
             "expires_at": (datetime.now() + timedelta(hours=1)).isoformat(),
         }
-        mgr = self._make_manager(tmp_path, tokens)
+        mgr = token_manager(tokens)
         assert mgr.get_access_token() == "cached-token"
 
-    def test_expired_token_triggers_refresh(self, tmp_path):
+    def test_numeric_expiry(self, token_manager):
+        import time
+        valid = {"access_token": "cached-token", "expires_at": int(time.time()) + 3600}
+        assert token_manager(valid).get_access_token() == "cached-token"
+
+        mgr = token_manager()
+        assert mgr._is_expired({"access_token": "x", "expires_at": int(time.time()) + 60})
+
+    def test_save_stores_unix_expiry(self, token_manager):
+        import time
+        mgr = token_manager()
+        before = int(time.time())
+        mgr._save({"access_token": "x", "expires_in": 1800})
+        expires_at = mgr.storage.load()["expires_at"]
+        assert before + 1800 <= expires_at <= int(time.time()) + 1800
+
+    def test_expired_token_triggers_refresh(self, token_manager, make_resp):
         tokens = {
             "access_token": "old",
             "refresh_token": "ref",
             "expires_at": (datetime.now() - timedelta(hours=1)).isoformat(),
         }
-        mgr = self._make_manager(tmp_path, tokens)
+        mgr = token_manager(tokens)
 
         # Mock the refresh endpoint
-        mock_resp = MagicMock()
-        mock_resp.json.return_value = {
+        mgr.session.post.return_value = make_resp({
             "access_token": "new-token",
             "refresh_token": "new-ref",
             "expires_in": 1800,
-        }
-        mock_resp.raise_for_status = MagicMock()
-        mgr.session.post.return_value = mock_resp
+        })
 
         result = mgr.get_access_token()
         assert result == "new-token"
         mgr.session.post.assert_called_once()
 
-    def test_no_tokens_triggers_auth(self, tmp_path):
+    def test_reads_tokens_from_file_storage(self, tmp_path, token_manager):
+        tokens = {"access_token": "on-disk", "expires_at": 2**31}
+        storage = FileStorage(str(tmp_path / "tokens.json"))
+        mgr = token_manager(tokens, storage=storage)
+        assert mgr.get_access_token() == "on-disk"
+        assert json.loads((tmp_path / "tokens.json").read_text()) == tokens
+
+    def test_no_tokens_triggers_auth(self, token_manager):
         """When no stored tokens exist, should attempt authentication."""
-        mgr = self._make_manager(tmp_path)  # No pre-loaded tokens
+        mgr = token_manager()  # No pre-loaded tokens
         # Mock _authenticate to avoid opening a browser
         mgr._authenticate = MagicMock(return_value={
             "access_token": "fresh-token",
@@ -146,3 +225,28 @@ class TestTokenManager:
         # get_access_token returns _authenticate()'s return value directly
         assert result["access_token"] == "fresh-token"
         mgr._authenticate.assert_called_once()
+
+    def test_authenticate_waits_for_callback(self, token_manager, make_resp):
+        import socket
+        import threading
+        import urllib.request
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+        mgr = token_manager()
+        mgr.redirect_uri = f"http://127.0.0.1:{port}"
+        mgr.session.post.return_value = make_resp(
+            {"access_token": "browser-token", "expires_in": 1800}
+        )
+
+        def fake_browser(url):
+            callback = f"{mgr.redirect_uri}/?code=abc123"
+            threading.Thread(target=lambda: urllib.request.urlopen(callback).read()).start()
+
+        with patch("kroger_cart.auth.webbrowser.open", side_effect=fake_browser):
+            assert mgr._authenticate() == "browser-token"
+
+        token_data = mgr.session.post.call_args.kwargs["data"]
+        assert token_data["code"] == "abc123"
@@ -0,0 +1,83 @@
+"""Tests for the persistent cache module."""
+
+import json
+from unittest.mock import patch
+
+from kroger_cart.cache import JsonCache, product_cache_key
+
+
+class TestJsonCache:
+    """Test the JSON file cache."""
+
+    def test_persists_between_instances(self, tmp_path):
+        path = str(tmp_path / "cache.json")
+        cache = JsonCache(path, ttl=60)
+        cache.set("milk", {"upc": "001111"})
+        cache.save()
+
+        assert JsonCache(path, ttl=60).get("milk") == {"upc": "001111"}
+
+    def test_delete_persists(self, tmp_path):
+        path = str(tmp_path / "cache.json")
+        cache = JsonCache(path, ttl=60)
+        cache.set("milk", {"upc": "001111"})
+        cache.save()
+
+        cache.delete("milk")
+        cache.delete("never-set")
+        cache.save()
+        assert JsonCache(path, ttl=60).get("milk") is None
+
+    def test_malformed_entries_are_misses(self, tmp_path):
+        path = tmp_path / "cache.json"
+        path.write_text(json.dumps({
+            "no-value": {"ts": 1000},
+            "bad-ts": {"value": "x", "ts": "yesterday"},
+            "not-a-dict": ["x"],
+        }))
+        cache = JsonCache(str(path), ttl=60)
+        with patch("kroger_cart.cache.time.time", return_value=1010):
+            for key in ("no-value", "bad-ts", "not-a-dict"):
+                assert cache.get(key) is None
+
+    def test_missing_file_is_empty(self, tmp_path):
+        cache = JsonCache(str(tmp_path / "missing.json"), ttl=60)
+        assert cache.get("milk") is None
+
+    def test_corrupt_file_is_empty(self, tmp_path):
+        path = tmp_path / "cache.json"
+        path.write_text("{not json")
+        assert JsonCache(str(path), ttl=60).get("milk") is None
+
+    def test_expired_entries_are_dropped(self, tmp_path):
+        path = tmp_path / "cache.json"
+        cache = JsonCache(str(path), ttl=60)
+        with patch("kroger_cart.cache.time.time", return_value=1000):
+            cache.set("milk", "old")
+        with patch("kroger_cart.cache.time.time", return_value=1030):
+            cache.set("eggs", "fresh")
+        with patch("kroger_cart.cache.time.time", return_value=1070):
+            assert cache.get("milk") is None
+            cache.save()
+
+        assert set(json.loads(path.read_text())) == {"eggs"}
+
+    def test_save_without_changes_does_not_write(self, tmp_path):
+        path = tmp_path / "cache.json"
+        JsonCache(str(path), ttl=60).save()
+        assert not path.exists()
+
+    def test_unwritable_path_does_not_raise(self, tmp_path):
+        cache = JsonCache(str(tmp_path / "missing-dir" / "cache.json"), ttl=60)
+        cache.set("milk", "x")
+        cache.save()
+
+
+class TestProductCacheKey:
+    """Test product cache key normalization."""
+
+    def test_normalizes_query(self):
+        assert product_cache_key("loc1", "  Whole Milk ") == product_cache_key("loc1", "whole milk")
+
+    def test_scoped_to_location(self):
+        assert product_cache_key("loc1", "milk") != product_cache_key("loc2", "milk")
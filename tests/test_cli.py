@@ -1,54 +1,41 @@
 """Tests for the CLI module."""
 
+import io
 import json
+import os
 import sys
 from unittest.mock import patch, MagicMock
 
 import pytest
 
-from kroger_cart.cli import parse_args, load_items, load_items_from_csv
+from kroger_cart.cli import main, parse_args, load_items, load_items_from_csv
 
 
 class TestParseArgs:
     """Test argument parsing."""
 
-    def test_items_flag(self):
-        args = parse_args(["--items", "milk", "eggs", "bread"])
-        assert args.items == ["milk", "eggs", "bread"]
-
-    def test_json_flag(self):
-        args = parse_args(["--json", '[{"query": "milk"}]'])
-        assert args.json_input == '[{"query": "milk"}]'
-
-    def test_stdin_flag(self):
-        args = parse_args(["--stdin"])
-        assert args.stdin is True
-
-    def test_csv_positional(self):
-        args = parse_args(["groceries.csv"])
-        assert args.csv_file == "groceries.csv"
-
-    def test_dry_run_flag(self):
-        args = parse_args(["--items", "milk", "--dry-run"])
-        assert args.dry_run is True
-
-    def test_output_json(self):
-        args = parse_args(["--items", "milk", "--output", "json"])
-        assert args.output == "json"
-
-    def test_modality(self):
-        args = parse_args(["--items", "milk", "--modality", "PICKUP"])
-        assert args.modality == "PICKUP"
-
-    def test_zip(self):
-        args = parse_args(["--items", "milk", "--zip", "90210"])
-        assert args.zip == "90210"
-
-    def test_token_storage(self):
-        args = parse_args(["--items", "milk", "--token-storage", "keyring"])
-        assert args.token_storage == "keyring"
-
-    def test_defaults(self):
+    @pytest.mark.parametrize("argv, attr, expected", [
+        (["--items", "milk", "eggs", "bread"], "items", ["milk", "eggs", "bread"]),
+        (["--json", '[{"query": "milk"}]'], "json_input", '[{"query": "milk"}]'),
+        (["--stdin"], "stdin", True),
+        (["groceries.csv"], "csv_file", "groceries.csv"),
+        (["--items", "milk", "--dry-run"], "dry_run", True),
+        (["--items", "milk", "--output", "json"], "output", "json"),
+        (["--items", "milk", "--modality", "PICKUP"], "modality", "PICKUP"),
+        (["--items", "milk", "--zip", "90210"], "zip", "90210"),
+        (["--items", "milk", "--token-storage", "keyring"], "token_storage", "keyring"),
+        (["--items", "milk", "--concurrency", "8"], "concurrency", 8),
+        (["--items", "milk", "--deals"], "deals", True),
+    ])
+    def test_flag(self, argv, attr, expected):
+        assert getattr(parse_args(argv), attr) == expected
+
+    def test_concurrency_must_be_positive(self):
+        with pytest.raises(SystemExit):
+            parse_args(["--items", "milk", "--concurrency", "0"])
+
+    def test_defaults(self, monkeypatch):
+        monkeypatch.delenv("KROGER_TOKEN_STORAGE", raising=False)
         args = parse_args(["--items", "milk"])
         assert args.output == "text"
         assert args.modality == "DELIVERY"
@@ -56,10 +43,34 @@ class TestParseArgs:
         assert args.deals is False
         assert args.auth_only is False
         assert args.token_storage == "auto"
+        assert args.concurrency == 5
+
+    def test_token_storage_from_env(self, monkeypatch):
+        monkeypatch.setenv("KROGER_TOKEN_STORAGE", "File")
+        assert parse_args(["--items", "milk"]).token_storage == "file"
+
+    def test_invalid_token_storage_env_rejected(self, monkeypatch, capsys):
+        monkeypatch.setenv("KROGER_TOKEN_STORAGE", "files")
+        with pytest.raises(SystemExit):
+            parse_args(["--items", "milk"])
+        assert "KROGER_TOKEN_STORAGE must be one of auto, file, keyring" in capsys.readouterr().err
+
+    def test_parser_reused(self):
+        from kroger_cart import cli
+        parse_args(["--items", "milk"])
+        parser = cli._PARSER
+        parse_args(["--items", "eggs"])
+        assert cli._PARSER is parser
+
+    def test_env_defaults_read_per_call(self, monkeypatch):
+        monkeypatch.setenv("KROGER_ZIP", "90210")
+        monkeypatch.setenv("KROGER_ENV", "cert")
+        args = parse_args(["--items", "milk"])
+        assert args.zip == "90210"
+        assert args.env == "CERT"
 
-    def test_deals_flag(self):
-        args = parse_args(["--items", "milk", "--deals"])
-        assert args.deals is True
+        monkeypatch.delenv("KROGER_ZIP")
+        assert parse_args(["--items", "milk"]).zip == "84045"
 
 
 class TestLoadItems:
@@ -107,6 +118,32 @@ class TestLoadCSV:
         items = load_items_from_csv(str(csv_file))
         assert items[0]["quantity"] == 1
 
+    def test_csv_with_upc_column(self, tmp_path):
+        csv_file = tmp_path / "items.csv"
+        csv_file.write_text("upc,quantity\n0001111041700,3\n")
+        items = load_items_from_csv(str(csv_file))
+        assert items == [{"upc": "0001111041700", "quantity": 3}]
+
+    def test_csv_quoted_fields_and_blank_lines(self, tmp_path):
+        csv_file = tmp_path / "items.csv"
+        csv_file.write_text('quantity,query\n2,"cheese, sharp cheddar"\n\n,bread\n')
+        items = load_items_from_csv(str(csv_file))
+        assert items == [
+            {"query": "cheese, sharp cheddar", "quantity": 2},
+            {"query": "bread", "quantity": 1},
+        ]
+
+    def test_csv_short_row(self, tmp_path):
+        csv_file = tmp_path / "items.csv"
+        csv_file.write_text("query,quantity\nmilk\n")
+        items = load_items_from_csv(str(csv_file))
+        assert items == [{"query": "milk", "quantity": 1}]
+
+    def test_empty_csv(self, tmp_path):
+        csv_file = tmp_path / "items.csv"
+        csv_file.write_text("")
+        assert load_items_from_csv(str(csv_file)) == []
+
 
 class TestParseArgsExtended:
     """Test new CLI flags."""
@@ -133,8 +170,368 @@ class TestLoadItemsValidation:
         with pytest.raises(ValueError, match="JSON array"):
             load_items(args)
 
+    def test_json_item_must_be_object(self):
+        args = parse_args(["--json", '["milk"]'])
+        with pytest.raises(ValueError, match="item 0 must be an object"):
+            load_items(args)
+
+    def test_json_item_needs_search_key(self):
+        args = parse_args(["--json", '[{"query": "milk"}, {"quantity": 2}]'])
+        with pytest.raises(ValueError, match="item 1 needs a query, upc, or name"):
+            load_items(args)
+
+    def test_stdin_items_validated(self):
+        args = parse_args(["--stdin"])
+        with patch("sys.stdin", io.TextIOWrapper(io.BytesIO(b'[{"upc": "001111"}, 3]'))):
+            with pytest.raises(ValueError, match="stdin item 1"):
+                load_items(args)
+
+    def test_stdin_reads_utf8_bytes(self):
+        args = parse_args(["--stdin"])
+        payload = '[{"query": "jalapeño"}]'.encode()
+        with patch("sys.stdin", io.TextIOWrapper(io.BytesIO(payload))):
+            assert load_items(args) == [{"query": "jalapeño", "quantity": 1}]
+
+    def test_stdin_without_buffer(self):
+        args = parse_args(["--stdin"])
+        with patch("sys.stdin", io.StringIO('[{"query": "milk"}]')):
+            assert load_items(args) == [{"query": "milk", "quantity": 1}]
+
+    def test_numeric_upc_converted_to_string(self):
+        args = parse_args(["--json", '[{"upc": 1111}]'])
+        assert load_items(args) == [{"upc": "1111", "quantity": 1}]
+
+    @pytest.mark.parametrize("item", [
+        '{"query": 42}',
+        '{"query": "   "}',
+        '{"name": ["milk"]}',
+    ])
+    def test_search_key_must_be_string(self, item):
+        args = parse_args(["--json", f"[{item}]"])
+        with pytest.raises(ValueError, match="item 0 .* must be a non-empty string"):
+            load_items(args)
+
+    @pytest.mark.parametrize("quantity", ['"two"', "0", "-1", "1.5", "true"])
+    def test_quantity_must_be_positive_int(self, quantity):
+        args = parse_args(["--json", f'[{{"query": "milk", "quantity": {quantity}}}]'])
+        with pytest.raises(ValueError, match="item 0 quantity must be a positive integer"):
+            load_items(args)
+
     def test_json_sets_default_quantity(self):
         args = parse_args(["--json", '[{"query": "milk"}]'])
         items = load_items(args)
         assert items[0]["quantity"] == 1
 
+
+class TestProcessItems:
+    """Test the search-then-add pipeline."""
+
+    def _products(self, queries):
+        return [[{"upc": f"upc-{q}", "description": q}] for q in queries]
+
+    def test_adds_found_items_in_batches(self):
+        from kroger_cart.cli import process_items
+
+        items = [{"query": f"item{i}", "quantity": 1} for i in range(5)]
+        with patch("kroger_cart.api.CART_BATCH_SIZE", 2), \
+             patch("kroger_cart.api.search_products",
+                   side_effect=lambda *args, **kwargs: self._products(args[3])), \
+             patch("kroger_cart.api.add_to_cart_batch") as add_batch:
+            added, not_found, location_id = process_items(
+                MagicMock(), "token", "https://api.kroger.com/v1", items,
+                "84045", "DELIVERY", location_id="loc1",
+            )
+
+        assert [call.args[3] for call in add_batch.call_args_list] == [
+            added[0:2], added[2:4], added[4:5],
+        ]
+        assert len(added) == 5
+        assert not_found == []
+        assert location_id == "loc1"
+
+    def test_failed_batch_moves_items_to_not_found(self):
+        from kroger_cart.cli import process_items
+
+        items = [{"query": f"item{i}", "quantity": 1} for i in range(3)]
+        with patch("kroger_cart.api.CART_BATCH_SIZE", 2), \
+             patch("kroger_cart.api.search_products",
+                   side_effect=lambda *args, **kwargs: self._products(args[3])), \
+             patch("kroger_cart.api.add_to_cart_batch",
+                   side_effect=[Exception("boom"), {"status": 204}]):
+            added, not_found, _ = process_items(
+                MagicMock(), "token", "https://api.kroger.com/v1", items,
+                "84045", "DELIVERY", location_id="loc1",
+            )
+
+        assert [item["query"] for item in added] == ["item2"]
+        assert not_found == ["item0", "item1"]
+
+    def test_duplicate_queries_searched_once(self):
+        from kroger_cart.cli import process_items
+
+        items = [
+            {"query": "milk", "quantity": 1},
+            {"query": "eggs", "quantity": 1},
+            {"query": " Milk ", "quantity": 2},
+        ]
+        with patch("kroger_cart.api.search_products",
+                   side_effect=lambda *args, **kwargs: self._products(args[3])) as search:
+            added, not_found, _ = process_items(
+                MagicMock(), "token", "https://api.kroger.com/v1", items,
+                "84045", "DELIVERY", dry_run=True, location_id="loc1",
+            )
+
+        assert search.call_args.args[3] == ["milk", "eggs"]
+        assert [(item["query"], item["upc"], item["quantity"]) for item in added] == [
+            ("milk", "upc-milk", 1),
+            ("eggs", "upc-eggs", 1),
+            (" Milk ", "upc-milk", 2),
+        ]
+
+    def test_cached_products_skip_search(self, tmp_path):
+        from kroger_cart.cache import JsonCache, product_cache_key
+        from kroger_cart.cli import process_items
+
+        cache = JsonCache(str(tmp_path / "products.json"), ttl=60)
+        cache.set(product_cache_key("loc1", "milk"), {"upc": "upc-milk", "name": "Milk"})
+        items = [{"query": "Milk", "quantity": 1}, {"query": "eggs", "quantity": 2}]
+
+        with patch("kroger_cart.api.search_products",
+                   side_effect=lambda *args, **kwargs: self._products(args[3])) as search:
+            added, not_found, _ = process_items(
+                MagicMock(), "token", "https://api.kroger.com/v1", items,
+                "84045", "DELIVERY", dry_run=True, location_id="loc1", product_cache=cache,
+            )
+
+        assert search.call_args.args[3] == ["eggs"]
+        assert [item["upc"] for item in added] == ["upc-milk", "upc-eggs"]
+        assert cache.get(product_cache_key("loc1", "eggs"))["upc"] == "upc-eggs"
+
+    def test_cache_stores_match_only(self, tmp_path):
+        from kroger_cart.cache import JsonCache, product_cache_key
+        from kroger_cart.cli import process_items
+
+        cache = JsonCache(str(tmp_path / "products.json"), ttl=60)
+        products = [[{
+            "upc": "001111", "description": "Milk",
+            "items": [{"price": {"regular": 3.99}, "fulfillment": {"inStock": True}}],
+        }]]
+        with patch("kroger_cart.api.search_products", return_value=products):
+            added, _, _ = process_items(
+                MagicMock(), "token", "https://api.kroger.com/v1", [{"query": "milk"}],
+                "84045", "DELIVERY", dry_run=True, location_id="loc1", product_cache=cache,
+            )
+
+        assert added[0]["price"] == 3.99
+        assert "cached" not in added[0]
+        assert cache.get(product_cache_key("loc1", "milk")) == {"upc": "001111", "name": "Milk"}
+
+    def test_cached_hit_has_no_stale_price_or_stock(self, tmp_path):
+        from kroger_cart.cache import JsonCache, product_cache_key
+        from kroger_cart.cli import process_items
+
+        # An entry written with full product info, e.g. by an older version
+        cache = JsonCache(str(tmp_path / "products.json"), ttl=60)
+        cache.set(product_cache_key("loc1", "milk"), {
+            "upc": "001111", "name": "Milk", "price": 3.99, "promo_price": 2.99,
+            "on_sale": True, "savings": 1.0, "in_stock": True,
+        })
+
+        with patch("kroger_cart.api.search_products", return_value=[]):
+            added, _, _ = process_items(
+                MagicMock(), "token", "https://api.kroger.com/v1", [{"query": "milk"}],
+                "84045", "DELIVERY", dry_run=True, location_id="loc1", product_cache=cache,
+            )
+
+        assert added[0]["upc"] == "001111"
+        assert added[0]["cached"] is True
+        for field in ("price", "promo_price", "on_sale", "savings", "in_stock"):
+            assert field not in added[0]
+
+    def test_failed_batch_forgets_cached_matches(self, tmp_path):
+        from kroger_cart.cache import JsonCache, product_cache_key
+        from kroger_cart.cli import process_items
+
+        cache = JsonCache(str(tmp_path / "products.json"), ttl=60)
+        cache.set(product_cache_key("loc1", "milk"), {"upc": "discontinued", "name": "Milk"})
+        items = [{"query": "milk"}, {"query": "eggs"}]
+
+        with patch("kroger_cart.api.search_products",
+                   side_effect=lambda *args, **kwargs: self._products(args[3])), \
+             patch("kroger_cart.api.add_to_cart_batch", side_effect=Exception("bad upc")):
+            added, not_found, _ = process_items(
+                MagicMock(), "token", "https://api.kroger.com/v1", items,
+                "84045", "DELIVERY", location_id="loc1", product_cache=cache,
+            )
+
+        assert added == []
+        assert not_found == ["milk", "eggs"]
+        assert cache.get(product_cache_key("loc1", "milk")) is None
+        assert cache.get(product_cache_key("loc1", "eggs")) is None
+
+
+class TestJsonOutput:
+    """Test machine-readable output."""
+
+    def test_print_json_result(self, capsys):
+        from kroger_cart.cli import print_json_result
+
+        added = [
+            {"name": "Milk", "upc": "001111", "quantity": 2, "on_sale": True, "savings": 0.5},
+            {"name": "Eggs", "upc": "002222", "quantity": 1, "on_sale": False},
+        ]
+        print_json_result(added, ["caviar"], "DELIVERY", dry_run=False)
+
+        result = json.loads(capsys.readouterr().out)
+        assert result["success"] is True
+        assert result["added_count"] == 2
+        assert result["not_found"] == ["caviar"]
+        assert result["deals_count"] == 1
+        assert result["total_savings"] == 1.0
+
+    def test_print_cart_json(self, capsys):
+        from kroger_cart.cli import print_cart_json
+
+        print_cart_json([{"upc": "001111", "quantity": 2}])
+        result = json.loads(capsys.readouterr().out)
+        assert result["item_count"] == 1
+        assert result["cart_items"][0]["upc"] == "001111"
+
+
+class TestTextOutput:
+    """Test human-readable output."""
+
+    def test_print_text_summary(self, capsys):
+        from kroger_cart.cli import print_text_summary
+
+        added = [
+            {"name": "Milk", "quantity": 2, "price": 3.99, "promo_price": 2.99,
+             "on_sale": True, "savings": 1.0, "savings_pct": 25},
+            {"name": "Eggs", "quantity": 1, "price": 2.79, "on_sale": False},
+        ]
+        print_text_summary(added, ["caviar"], "DELIVERY", dry_run=False)
+
+        assert capsys.readouterr().out == (
+            "\n" + "=" * 50 + "\nSUMMARY\n" + "=" * 50 + "\n"
+            "\n✓ Successfully added (2):\n"
+            "  - Milk (x2) — $3.99 → $2.99 (SAVE $1.00, 25%) 🔥\n"
+            "  - Eggs (x1) — $2.79\n"
+            "\n✗ Not found or failed (1):\n"
+            "  - caviar\n"
+            "\n💰 1 item(s) on sale — total savings: $2.00\n"
+            "\n🛒 View your cart: https://www.smithsfoodanddrug.com/cart\n"
+            "   (Complete checkout manually in your browser)\n"
+        )
+
+    def test_print_text_summary_dry_run(self, capsys):
+        from kroger_cart.cli import print_text_summary
+
+        print_text_summary([], [], "DELIVERY", dry_run=True)
+        out = capsys.readouterr().out
+        assert "SUMMARY (DRY RUN)" in out
+        assert out.endswith("\n🔍 Dry run complete — no items were added to cart.\n")
+
+
+class TestCartText:
+    """Test human-readable cart output."""
+
+    def test_lists_items(self, capsys):
+        from kroger_cart.cli import print_cart_text
+
+        print_cart_text([{"upc": "001111", "quantity": 2}, {"upc": "002222"}])
+        assert capsys.readouterr().out == (
+            "\n" + "=" * 50 + "\nCURRENT CART\n" + "=" * 50 + "\n"
+            "\n🛒 2 item(s) in cart:\n"
+            "  - UPC 001111 (x2)\n"
+            "  - UPC 002222 (x1)\n"
+            "\n🔗 https://www.smithsfoodanddrug.com/cart\n"
+        )
+
+    def test_empty_cart(self, capsys):
+        from kroger_cart.cli import print_cart_text
+
+        print_cart_text([])
+        out = capsys.readouterr().out
+        assert out.endswith("=" * 50 + "\n\n🛒 Your cart is empty.\n")
+        assert "item(s) in cart" not in out
+
+
+class TestConfigDir:
+    """Test config directory resolution."""
+
+    def test_created_once_and_reused(self, tmp_path, monkeypatch):
+        from kroger_cart.cli import get_config_dir
+
+        monkeypatch.setenv("HOME", str(tmp_path))
+        with patch("os.makedirs") as makedirs:
+            first = get_config_dir()
+            second = get_config_dir()
+
+        assert first == second == str(tmp_path / ".config" / "kroger-cart")
+        makedirs.assert_called_once_with(first, exist_ok=True)
+
+
+class TestBuildConfig:
+    """Test config assembly from CLI args."""
+
+    @pytest.mark.parametrize("env, domain", [
+        ("PROD", "api.kroger.com"),
+        ("CERT", "api-ce.kroger.com"),
+    ])
+    def test_api_urls_per_env(self, tmp_path, env, domain):
+        from kroger_cart.cli import build_config
+
+        with patch("kroger_cart.cli.get_config_dir", return_value=str(tmp_path)):
+            config = build_config(parse_args(["--env", env]))
+
+        assert config["api_base"] == f"https://{domain}/v1"
+        assert config["token_url"] == f"https://{domain}/v1/connect/oauth2/token"
+        assert config["auth_url"] == f"https://{domain}/v1/connect/oauth2/authorize"
+        assert config["token_file"] == str(tmp_path / "tokens.json")
+
+
+class TestMain:
+    """Test main() orchestration with the network layer stubbed out."""
+
+    @pytest.fixture(autouse=True)
+    def _isolated_env(self, tmp_path, monkeypatch):
+        """Keep the developer's shell and checkout .env out of main()."""
+        for name in list(os.environ):
+            if name.startswith("KROGER_"):
+                monkeypatch.delenv(name)
+        monkeypatch.setattr("kroger_cart.cli._PROJECT_ENV", str(tmp_path / "missing.env"))
+
+    def _run(self, tmp_path, argv, result=([{"upc": "001"}], [], "loc-from-api")):
+        with patch("kroger_cart.cli.get_config_dir", return_value=str(tmp_path)), \
+             patch("kroger_cart.auth.TokenManager") as token_mgr, \
+             patch("kroger_cart.cli.process_items", return_value=result) as process:
+            token_mgr.return_value.get_access_token.return_value = "token"
+            main(argv)
+        return process.call_args.kwargs
+
+    def test_location_id_cached_between_runs(self, tmp_path, capsys):
+        first = self._run(tmp_path, ["--items", "milk", "--output", "json"])
+        second = self._run(tmp_path, ["--items", "milk", "--output", "json"])
+        assert first["location_id"] is None
+        assert second["location_id"] == "loc-from-api"
+
+    def test_saved_location_forgotten_when_nothing_found(self, tmp_path, capsys):
+        self._run(tmp_path, ["--items", "milk", "--output", "json"])
+        second = self._run(tmp_path, ["--items", "milk", "--output", "json"],
+                           result=([], ["milk"], "loc-from-api"))
+        third = self._run(tmp_path, ["--items", "milk", "--output", "json"])
+        assert second["location_id"] == "loc-from-api"
+        assert third["location_id"] is None
+
+    def test_json_error_when_no_items(self, tmp_path, capsys):
+        with patch("kroger_cart.cli.get_config_dir", return_value=str(tmp_path)):
+            with pytest.raises(SystemExit):
+                main(["--output", "json"])
+        assert json.loads(capsys.readouterr().out) == {
+            "success": False, "error": "No items provided.",
+        }
+
+    def test_location_id_flag_skips_cache(self, tmp_path, capsys):
+        kwargs = self._run(tmp_path, ["--items", "milk", "--location-id", "L9", "--output", "json"])
+        assert kwargs["location_id"] == "L9"
+        assert not (tmp_path / "location_cache.json").exists()
@@ -0,0 +1,40 @@
+"""Tests for the JSON helper module."""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from kroger_cart import _json
+
+
+@pytest.mark.parametrize("backend", ["default", "stdlib"])
+class TestJsonHelpers:
+    """The helpers behave the same with and without orjson."""
+
+    @pytest.fixture(autouse=True)
+    def _backend(self, backend):
+        if backend == "stdlib":
+            with patch.object(_json, "orjson", None):
+                yield
+        else:
+            yield
+
+    def test_round_trip(self):
+        data = {"access_token": "abc", "expires_in": 1800, "items": [1, 2]}
+        assert _json.loads(_json.dumps(data)) == data
+
+    def test_loads_bytes(self):
+        assert _json.loads(b'[{"query": "milk"}]') == [{"query": "milk"}]
+
+    def test_invalid_json_raises_decode_error(self):
+        with pytest.raises(json.JSONDecodeError):
+            _json.loads("not json")
+
+    def test_compact_and_indented_layout(self):
+        data = {"success": True, "added": [{"upc": "001111"}]}
+        assert _json.dumps(data) == '{"success":true,"added":[{"upc":"001111"}]}'
+        assert _json.dumps(data, pretty=True) == json.dumps(data, indent=2)
+
+    def test_non_ascii_is_not_escaped(self):
+        assert _json.dumps({"name": "Café"}) == '{"name":"Café"}'
@@ -0,0 +1,25 @@
+"""Tests for the session module."""
+
+from kroger_cart.session import POOL_MAXSIZE, create_session
+
+
+class TestCreateSession:
+    """Test HTTP session configuration."""
+
+    def test_retries_transient_errors(self):
+        session = create_session()
+        retry = session.get_adapter("https://api.kroger.com").max_retries
+        assert retry.total == 3
+        assert 429 in retry.status_forcelist
+
+    def test_pool_sized_for_concurrent_searches(self):
+        from kroger_cart.api import DEFAULT_SEARCH_WORKERS
+
+        session = create_session()
+        adapter = session.get_adapter("https://api.kroger.com")
+        assert adapter._pool_maxsize == POOL_MAXSIZE
+        assert POOL_MAXSIZE >= DEFAULT_SEARCH_WORKERS
+
+    def test_pool_size_override(self):
+        session = create_session(pool_maxsize=32)
+        assert session.get_adapter("https://api.kroger.com")._pool_maxsize == 32